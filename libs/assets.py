@@ -0,0 +1,56 @@
+import pygame
+
+
+class Assets():
+
+    # cada arquivo é lido do disco uma vez só. as imagens são convertidas
+    # para o formato da tela e guardadas por (caminho, variante); todos que
+    # pedem o mesmo caminho recebem a mesma superfície, então ninguém deve
+    # desenhar em cima de uma imagem carregada por aqui
+    def __init__(self):
+        self.images = {}
+        self.sounds = {}
+        self.loads = 0
+        self.hits = 0
+
+    def image(self, path, variant='alpha'):
+        key = (path, variant)
+        img = self.images.get(key)
+        if img is not None:
+            self.hits += 1
+            return img
+        if variant == 'alpha':
+            self.loads += 1
+            img = pygame.image.load(path).convert_alpha()
+        elif variant == 'opaque':
+            self.loads += 1
+            img = pygame.image.load(path).convert()
+        else:
+            raise ValueError('variante de imagem desconhecida: ' + str(variant))
+        self.images[key] = img
+        return img
+
+    def sound(self, path):
+        sound = self.sounds.get(path)
+        if sound is None:
+            self.loads += 1
+            sound = self.sounds[path] = pygame.mixer.Sound(path)
+        else:
+            self.hits += 1
+        return sound
+
+    def drop(self, prefix):
+        # esquece as imagens de uma pasta (as de um nível, quando ele acaba)
+        for key in [key for key in self.images if key[0].startswith(prefix)]:
+            del self.images[key]
+
+    def report(self):
+        # bytes ocupados pelas imagens e pelos sons
+        image_bytes = sum(img.get_width() * img.get_height() * img.get_bytesize() for img in self.images.values())
+        mixer = pygame.mixer.get_init()
+        sound_bytes = 0
+        if mixer:
+            [frequency, size, channels] = mixer
+            sound_bytes = sum(int(sound.get_length() * frequency) * abs(size) // 8 * channels for sound in self.sounds.values())
+        return {'images': len(self.images), 'image bytes': image_bytes, 'sounds': len(self.sounds),
+                'sound bytes': sound_bytes, 'loads': self.loads, 'hits': self.hits}
@@ -0,0 +1,68 @@
+from collections import deque
+
+
+class Blackboard():
+
+    # valores lembrados entre frames, separados por escopo: 'game' (menu e
+    # opções), 'level' (apagado no reset_all) ou o ID de um objeto (apagado
+    # quando ele sai do jogo). cada escopo tem um dicionário por tipo
+    kinds = ['changed', 'history', 'once']
+
+    def __init__(self):
+        self.scopes = {}
+        self.evicted = 0
+        self.cleared = 0
+
+    def scope(self, name):
+        scope = self.scopes.get(name)
+        if scope is None:
+            scope = self.scopes[name] = {kind: {} for kind in self.kinds}
+        return scope
+
+    def changed(self, value, scope, key):
+        # na primeira vez devolve o próprio valor
+        slots = self.scope(scope)['changed']
+        if key not in slots:
+            slots[key] = value
+            return value
+        if slots[key] == value:
+            return False
+        slots[key] = value
+        return True
+
+    def history(self, value, size, scope, key):
+        # últimos valores, do mais novo para o mais velho
+        slots = self.scope(scope)['history']
+        values = slots.get(key)
+        if values is None:
+            slots[key] = deque(maxlen=size)
+            return []
+        values.append(value)
+        return list(reversed(values))
+
+    def once(self, scope, key):
+        # True só na primeira chamada
+        slots = self.scope(scope)['once']
+        if key in slots:
+            return False
+        slots[key] = True
+        return True
+
+    def clear(self, name):
+        scope = self.scopes.pop(name, None)
+        if scope:
+            self.evicted += sum(len(slots) for slots in scope.values())
+            self.cleared += 1
+
+    def clear_all(self, keep=('game',)):
+        for name in list(self.scopes):
+            if name not in keep:
+                self.clear(name)
+
+    def report(self):
+        # tamanho atual por tipo e quanto já foi apagado
+        size = {kind: 0 for kind in self.kinds}
+        for scope in self.scopes.values():
+            for kind, slots in scope.items():
+                size[kind] += len(slots)
+        return {'scopes': len(self.scopes), 'size': size, 'evicted': self.evicted, 'cleared scopes': self.cleared}
@@ -0,0 +1,136 @@
+import operator
+import numpy as np
+
+
+class BodyStore():
+
+    # cada corpo é uma linha destes arrays; o Object só guarda o índice
+    vectors = ['pos', 'vel', 'force', 'prev_pos']
+    scalars = ['ang', 'ang_vel', 'torque', 'inv_mass', 'inv_inertia', 'prev_ang']
+    flags = ['static', 'allow_gravity', 'sleeping', 'saved']
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.count = 0
+        self.free = []
+        for name in self.vectors:
+            setattr(self, name, np.zeros((capacity, 2)))
+        for name in self.scalars:
+            setattr(self, name, np.zeros(capacity))
+        for name in self.flags:
+            setattr(self, name, np.zeros(capacity, bool))
+
+    def grow(self):
+        # os arrays são trocados: obj.pos é uma view e só vale até o próximo
+        # corpo criado. quem precisa guardar a posição guarda uma cópia
+        capacity = self.capacity * 2
+        for name in self.vectors + self.scalars + self.flags:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:self.capacity] = old
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def add(self):
+        if self.free:
+            return self.free.pop()
+        if self.count == self.capacity:
+            self.grow()
+        self.count += 1
+        return self.count - 1
+
+    def remove(self, row):
+        for name in self.vectors + self.scalars + self.flags:
+            getattr(self, name)[row] = 0
+        self.free.append(row)
+
+    def clear(self):
+        # todas as linhas voltam a ficar livres, sem trocar os arrays
+        for name in self.vectors + self.scalars + self.flags:
+            getattr(self, name)[:self.count] = 0
+        self.count = 0
+        self.free = []
+
+    def rows(self, obj_list):
+        return np.fromiter((obj.row for obj in obj_list), np.intp, len(obj_list))
+
+    def save(self, rows):
+        # estado do passo anterior, usado na interpolação do render
+        self.prev_pos[rows] = self.pos[rows]
+        self.prev_ang[rows] = self.ang[rows]
+        self.saved[rows] = True
+
+    def integrate(self, rows, gravity, dt, drag):
+        rows = rows[~self.sleeping[rows]]
+        falling = rows[self.allow_gravity[rows] & ~self.static[rows]]
+
+        vel = self.vel
+        vel[rows] += self.force[rows] * self.inv_mass[rows, None] * dt
+        vel[falling] += np.asarray(gravity) * dt
+        self.ang_vel[rows] += self.torque[rows] * self.inv_inertia[rows]
+
+        vel[rows] *= drag
+        self.ang_vel[rows] *= drag
+
+        self.pos[rows] += vel[rows] * dt
+        self.ang[rows] += self.ang_vel[rows] * dt
+
+
+class Vector():
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        return getattr(obj.store, self.name)[obj.row]
+
+    def __set__(self, obj, value):
+        getattr(obj.store, self.name)[obj.row] = value
+
+
+class Scalar(Vector):
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        return float(getattr(obj.store, self.name)[obj.row])
+
+
+class Previous():
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        store = obj.store
+        row = obj.row
+        if not store.saved[row]:
+            return False
+        p = store.prev_pos[row]
+        return [float(p[0]), float(p[1]), float(store.prev_ang[row])]
+
+    def __set__(self, obj, value):
+        store = obj.store
+        row = obj.row
+        store.saved[row] = bool(value)
+        if value:
+            store.prev_pos[row] = value[:2]
+            store.prev_ang[row] = value[2]
+
+
+class Mirror(property):
+
+    # só o python escreve estes campos: o valor fica no slot '_nome' e a
+    # leitura é um attrgetter, feito em C sem passar pelo numpy; a escrita
+    # atualiza também o array. só para valores imutáveis (números e bool):
+    # um vetor guardado aqui mudaria por índice sem chegar no array
+    def __init__(self, name):
+        slot = '_' + name
+
+        def write(obj, value):
+            setattr(obj, slot, value)
+            getattr(obj.store, name)[obj.row] = value
+
+        property.__init__(self, operator.attrgetter(slot), write)
+
@@ -0,0 +1,394 @@
+# camadas de colisão: cada corpo tem uma categoria (um bit) e uma máscara
+# com as categorias com que colide. corpos do mesmo grupo negativo nunca
+# colidem entre si, e do mesmo grupo positivo sempre colidem. um corpo
+# nunca colide com os IDs no seu joined (juntas e exclusões de um só par);
+# basta um dos dois lados ter o ID do outro
+LEVEL = 1
+PLAYER = 2
+LIMB = 4
+BLOOD = 8
+SHARD = 16
+ITEM = 32
+BULLET = 64
+ALL = 0xffff
+
+
+def collides(A, B):
+    if B.ID in A.joined or A.ID in B.joined:
+        return False
+    if A.group and A.group == B.group:
+        return A.group > 0
+    return bool(A.category & B.mask and B.category & A.mask)
+
+
+def query(box, obj_list):
+    found = []
+    for obj in obj_list:
+        b = obj.box
+        if not (box[1] < b[0] or box[0] > b[1] or box[3] < b[2] or box[2] > b[3]):
+            found.append(obj)
+    return found
+
+
+class SpatialHash():
+
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def bake(self, obj_list):
+        pass
+
+    def remove(self, obj):
+        pass
+
+    def touch(self, obj):
+        pass
+
+    def insert(self, obj):
+        pass
+
+    def cell_range(self, box):
+        s = self.cell_size
+        return int(box[0] // s), int(box[1] // s), int(box[2] // s), int(box[3] // s)
+
+    def build(self, obj_list):
+        # cada célula guarda [dinâmicos, estáticos] pelo índice na obj_list
+        cells = {}
+        for i in range(len(obj_list)):
+            obj = obj_list[i]
+            if obj.figure:
+                continue
+            k = 1 if obj.static else 0
+            x0, x1, y0, y1 = self.cell_range(obj.box)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    cell = cells.get((x, y))
+                    if cell is None:
+                        cell = cells[(x, y)] = [[], []]
+                    cell[k].append(i)
+        self.cells = cells
+
+    def pairs(self, obj_list):
+        self.build(obj_list)
+        found = set()
+        for dynamic, static in self.cells.values():
+            n = len(dynamic)
+            for a in range(n):
+                i = dynamic[a]
+                for b in range(a + 1, n):
+                    found.add((i, dynamic[b]))
+                for j in static:
+                    found.add((i, j) if i < j else (j, i))
+        return [(obj_list[i], obj_list[j]) for i, j in sorted(found) if collides(obj_list[i], obj_list[j])]
+
+    def query(self, box, obj_list):
+        return query(box, obj_list)
+
+
+class AllPairs():
+
+    def bake(self, obj_list):
+        pass
+
+    def remove(self, obj):
+        pass
+
+    def touch(self, obj):
+        pass
+
+    def insert(self, obj):
+        pass
+
+    def pairs(self, obj_list):
+        found = []
+        n = len(obj_list)
+        for i in range(n):
+            A = obj_list[i]
+            if A.figure:
+                continue
+            for j in range(i + 1, n):
+                B = obj_list[j]
+                if not B.figure and (not A.static or not B.static) and collides(A, B):
+                    found.append((A, B))
+        return found
+
+    def query(self, box, obj_list):
+        return query(box, obj_list)
+
+
+class SweepAndPrune():
+
+    def __init__(self):
+        self.endpoints = []  # [x, 0 mínimo / 1 máximo, obj]
+        self.members = {}
+        self.overlaps = set()
+
+    def bake(self, obj_list):
+        pass
+
+    def key(self, A, B):
+        return (A, B) if A.ID < B.ID else (B, A)
+
+    def remove(self, obj):
+        # os destruídos saem em pairs(), quando não estão mais na obj_list
+        pass
+
+    def touch(self, obj):
+        pass
+
+    def insert(self, obj):
+        pass
+
+    def prune(self, removed):
+        self.endpoints = [e for e in self.endpoints if e[2] not in removed]
+        self.overlaps = {p for p in self.overlaps if p[0] not in removed and p[1] not in removed}
+        for obj in removed:
+            del self.members[obj]
+
+    def add(self, obj):
+        x0 = obj.box[0]
+        x1 = obj.box[1]
+        for other in self.members:
+            b = other.box
+            if b[0] <= x1 and x0 <= b[1]:
+                self.overlaps.add(self.key(obj, other))
+        emin = [x0, 0, obj]
+        emax = [x1, 1, obj]
+        self.members[obj] = [emin, emax]
+        self.endpoints.append(emin)
+        self.endpoints.append(emax)
+
+    def sort(self, new):
+        # insertion sort: com coerência entre frames quase não há trocas.
+        # os pares dos objetos novos já foram achados em add()
+        eps = self.endpoints
+        overlaps = self.overlaps
+        for i in range(1, len(eps)):
+            e = eps[i]
+            v = e[0]
+            k = e[1]
+            j = i - 1
+            while j >= 0 and (eps[j][0] > v or (eps[j][0] == v and eps[j][1] > k)):
+                f = eps[j]
+                if f[1] != k and e[2] not in new and f[2] not in new:
+                    if k == 0:
+                        overlaps.add(self.key(e[2], f[2]))
+                    else:
+                        overlaps.discard(self.key(e[2], f[2]))
+                eps[j + 1] = f
+                j -= 1
+            eps[j + 1] = e
+
+    def pairs(self, obj_list):
+        index = {}
+        for i in range(len(obj_list)):
+            index[obj_list[i]] = i
+
+        removed = [obj for obj in self.members if obj not in index]
+        if removed:
+            self.prune(set(removed))
+
+        for obj, (emin, emax) in self.members.items():
+            emin[0] = obj.box[0]
+            emax[0] = obj.box[1]
+
+        new = set()
+        for obj in obj_list:
+            if obj not in self.members:
+                self.add(obj)
+                new.add(obj)
+        self.sort(new)
+
+        found = []
+        for A, B in self.overlaps:
+            if A.figure or B.figure or (A.static and B.static):
+                continue
+            if A.box[3] < B.box[2] or A.box[2] > B.box[3] or not collides(A, B):
+                continue
+            i = index[A]
+            j = index[B]
+            found.append((i, j) if i < j else (j, i))
+        found.sort()
+        return [(obj_list[i], obj_list[j]) for i, j in found]
+
+    def query(self, box, obj_list):
+        return query(box, obj_list)
+
+
+class AABBTree():
+
+    def __init__(self, items, leaf_size=4):
+        # items: [box, obj]
+        self.leaf_size = leaf_size
+        self.root = self.build(items) if items else None
+
+    def merge(self, items):
+        return [min(i[0][0] for i in items), max(i[0][1] for i in items),
+                min(i[0][2] for i in items), max(i[0][3] for i in items)]
+
+    def build(self, items):
+        # nó: [box, filho esquerdo, filho direito, items da folha]
+        box = self.merge(items)
+        if len(items) <= self.leaf_size:
+            return [box, None, None, items]
+        axis = 0 if box[1] - box[0] >= box[3] - box[2] else 2
+        items = sorted(items, key=lambda i: i[0][axis] + i[0][axis + 1])
+        half = len(items) // 2
+        return [box, self.build(items[:half]), self.build(items[half:]), None]
+
+    def query(self, box):
+        found = []
+        if self.root is None:
+            return found
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            b = node[0]
+            if box[1] < b[0] or box[0] > b[1] or box[3] < b[2] or box[2] > b[3]:
+                continue
+            if node[3] is None:
+                stack.append(node[1])
+                stack.append(node[2])
+            else:
+                for b, obj in node[3]:
+                    if not (box[1] < b[0] or box[0] > b[1] or box[3] < b[2] or box[2] > b[3]):
+                        found.append(obj)
+        return found
+
+
+class StaticTree():
+
+    # os estáticos ficam numa árvore feita no bake. ninguém confere a árvore
+    # a cada passo: quem mexe num estático chama touch(), e só os tocados são
+    # vigiados. um estático que se moveu sai da árvore, vai para a grade dos
+    # dinâmicos e volta para a árvore depois de settle passos parado
+    def __init__(self, cell_size=128, tolerance=0.01, settle=60):
+        self.grid = SpatialHash(cell_size)
+        self.tolerance = tolerance
+        self.settle = settle
+        self.baked = {}
+        self.watch = {}  # objeto: [caixa no último passo, passos parado]
+        self.loose = {}  # fora da árvore, na ordem da obj_list
+        self.dirty = False
+        self.tree = AABBTree([])
+
+    def bake(self, obj_list):
+        self.baked = {}
+        self.watch = {}
+        self.loose = {}
+        for obj in obj_list:
+            if self.bakeable(obj):
+                self.baked[obj] = list(obj.box)
+            elif not obj.waiting:
+                self.loose[obj] = None
+        self.rebuild()
+
+    def bakeable(self, obj):
+        return obj.static and obj.parent is None
+
+    def touch(self, obj):
+        # obj vai ser movido (ou deixou de ser estático) pelo código do jogo
+        if obj in self.baked or self.bakeable(obj):
+            self.watch[obj] = [list(obj.box), 0]
+
+    def insert(self, obj):
+        # corpo novo ou que acordou; a árvore só muda no bake e no settle
+        if obj not in self.baked:
+            self.loose[obj] = None
+
+    def remove(self, obj):
+        # corpo destruído sai da árvore; ela é refeita uma vez só na próxima
+        # consulta, mesmo que vários tenham saído no mesmo frame
+        if self.baked.pop(obj, None) is not None:
+            self.dirty = True
+        self.watch.pop(obj, None)
+        self.loose.pop(obj, None)
+
+    def rebuild(self):
+        self.tree = AABBTree([[box, obj] for obj, box in self.baked.items()])
+        self.dirty = False
+
+    def changed(self, obj, box):
+        if not obj.static:
+            return True
+        b = obj.box
+        t = self.tolerance
+        return abs(b[0] - box[0]) > t or abs(b[1] - box[1]) > t or abs(b[2] - box[2]) > t or abs(b[3] - box[3]) > t
+
+    def update_watch(self):
+        # só os estáticos tocados são conferidos
+        for obj in list(self.watch):
+            item = self.watch[obj]
+            if obj in self.baked:
+                if self.changed(obj, self.baked[obj]):
+                    del self.baked[obj]
+                    self.dirty = True
+                    item[0] = list(obj.box)
+                    item[1] = 0
+                else:
+                    item[1] += 1
+            elif not self.bakeable(obj):
+                # virou dinâmico: fica na grade até alguém tocar de novo
+                del self.watch[obj]
+                continue
+            elif self.changed(obj, item[0]):
+                item[0] = list(obj.box)
+                item[1] = 0
+            else:
+                item[1] += 1
+            if item[1] >= self.settle:
+                del self.watch[obj]
+                if obj not in self.baked:
+                    self.baked[obj] = list(obj.box)
+                    self.loose.pop(obj, None)
+                    self.dirty = True
+
+    def pairs(self, obj_list):
+        if self.watch:
+            self.update_watch()
+        if self.dirty:
+            self.rebuild()
+
+        index = {}
+        dynamic = []
+        for i in range(len(obj_list)):
+            obj = obj_list[i]
+            index[obj] = i
+            if obj not in self.baked:
+                dynamic.append(obj)
+        self.loose = dict.fromkeys(dynamic)
+
+        found = set()
+        for A, B in self.grid.pairs(dynamic):
+            found.add((index[A], index[B]))
+
+        for A in dynamic:
+            if A.static or A.figure:
+                continue
+            i = index[A]
+            for B in self.tree.query(A.box):
+                j = index.get(B)
+                if j is not None and not B.figure and collides(A, B):
+                    found.add((i, j) if i < j else (j, i))
+
+        return [(obj_list[i], obj_list[j]) for i, j in sorted(found)]
+
+    def query(self, box, obj_list):
+        # árvore mais os corpos fora dela guardados no último pairs(); os
+        # destruídos já saíram dos dois, os em espera ficam de fora aqui
+        if self.dirty:
+            self.rebuild()
+        found = [obj for obj in self.tree.query(box) if not obj.waiting]
+        for obj in self.loose:
+            b = obj.box
+            if not (obj.waiting or box[1] < b[0] or box[0] > b[1] or box[3] < b[2] or box[2] > b[3]):
+                found.append(obj)
+        return found
+
+
+broadphase_dict = {'pairs': AllPairs, 'grid': SpatialHash, 'sap': SweepAndPrune, 'tree': StaticTree}
+
+
+def create(name):
+    return broadphase_dict[name]()
@@ -0,0 +1,49 @@
+class ChunkMap():
+
+    # o nível é dividido em faixas de largura fixa. objetos em espera ficam
+    # guardados nas faixas que tocam e só são vistos quando a faixa acorda
+    def __init__(self, size=512):
+        self.size = size
+        self.chunks = {}
+        self.members = {}  # objeto: [primeira faixa, última faixa]
+
+    def span(self, x0, x1):
+        return int(x0 // self.size), int(x1 // self.size)
+
+    def store(self, obj):
+        self.remove(obj)
+        k0, k1 = self.span(obj.box[0], obj.box[1])
+        self.members[obj] = [k0, k1]
+        for k in range(k0, k1 + 1):
+            chunk = self.chunks.get(k)
+            if chunk is None:
+                chunk = self.chunks[k] = {}
+            chunk[obj] = True
+
+    def remove(self, obj):
+        # tira o objeto de todas as faixas em que foi guardado
+        span = self.members.pop(obj, None)
+        if span is None:
+            return
+        for k in range(span[0], span[1] + 1):
+            chunk = self.chunks.get(k)
+            if chunk:
+                chunk.pop(obj, None)
+                if not chunk:
+                    del self.chunks[k]
+
+    def wake(self, k0, k1):
+        # cada objeto acorda uma vez só e sai também das outras faixas que ocupa
+        found = []
+        for k in range(k0, k1 + 1):
+            chunk = self.chunks.pop(k, None)
+            if chunk:
+                for obj in chunk:
+                    if obj in self.members:
+                        self.remove(obj)
+                        found.append(obj)
+        return found
+
+    def outside(self, obj, k0, k1):
+        b0, b1 = self.span(obj.box[0], obj.box[1])
+        return b1 < k0 or b0 > k1
@@ -0,0 +1,34 @@
+class SlotMap():
+
+    # handle = (slot, geração). quando um slot é liberado a geração sobe,
+    # então handles antigos param de achar o objeto em vez de achar outro
+    def __init__(self):
+        self.slots = []
+        self.generations = []
+        self.free = []
+
+    def add(self, obj):
+        if self.free:
+            slot = self.free.pop()
+            self.slots[slot] = obj
+        else:
+            slot = len(self.slots)
+            self.slots.append(obj)
+            self.generations.append(0)
+        return (slot, self.generations[slot])
+
+    def get(self, handle):
+        slot, generation = handle
+        if self.generations[slot] != generation:
+            return False
+        return self.slots[slot]
+
+    def remove(self, handle):
+        slot, generation = handle
+        if self.generations[slot] != generation:
+            return False
+        obj = self.slots[slot]
+        self.slots[slot] = None
+        self.generations[slot] += 1
+        self.free.append(slot)
+        return obj
@@ -5,7 +5,7 @@ def pol(a, b):
     return (a**2 + b**2)**0.5
 
 def dpp(a, b = False):
-    return pol(b[0]-a[0], b[1]-a[1]) if b else pol(a[0], a[1])
+    return pol(b[0]-a[0], b[1]-a[1]) if b is not False else pol(a[0], a[1])
 
 def dpl(p1, p2, p):
     if p2[0] != p1[0]:
@@ -32,6 +32,46 @@ def norm(vec):
     n2 = vec[1]/d if d!=0 else 0
     return [n1, n2]
 
+def segment_circle(p1, p2, c, r):
+    # primeiro t em [0, 1] em que o segmento p1-p2 toca o círculo
+    d = [p2[0] - p1[0], p2[1] - p1[1]]
+    f = [p1[0] - c[0], p1[1] - c[1]]
+    k = dot(f, f) - r ** 2
+    if k <= 0:
+        return [0, norm(f)]
+    a = dot(d, d)
+    b = 2 * dot(f, d)
+    delta = b ** 2 - 4 * a * k
+    if a == 0 or delta < 0:
+        return False
+    t = (-b - delta ** 0.5) / (2 * a)
+    if t < 0 or t > 1:
+        return False
+    return [t, norm([f[0] + d[0] * t, f[1] + d[1] * t])]
+
+def segment_poly(p1, p2, vertex, normals):
+    # recorte de Cyrus-Beck num polígono convexo de normais para fora
+    d = [p2[0] - p1[0], p2[1] - p1[1]]
+    t0 = 0
+    t1 = 1
+    normal = neg(norm(d))
+    for i in range(len(vertex)):
+        n = normals[i]
+        num = dot([vertex[i][0] - p1[0], vertex[i][1] - p1[1]], n)
+        den = dot(d, n)
+        if den == 0:
+            if num < 0:
+                return False
+        elif den < 0:
+            if num / den > t0:
+                t0 = num / den
+                normal = n
+        elif num / den < t1:
+            t1 = num / den
+        if t0 > t1:
+            return False
+    return [t0, normal]
+
 def random_color():
     r = random.randrange(50, 255)
     g = random.randrange(50, 255)
@@ -87,121 +127,6 @@ def intersection(l, pa, pb):
     else:
         return False
 
-def wait(t, time, ID):
-    for i in range(len(wait_list)):
-        if wait_list[i][0] == ID:
-            if time - wait_list[i][2] < 4 / fps:
-                wait_list[i][2] = time
-                return True if time - wait_list[i][1] > t else False
-            else:
-                del wait_list[i]
-                return False
-
-    wait_list.append([ID, time, time])
-    return False
-
-def activate(activate, ID):
-
-    if activate == -1:
-        a = -1
-    elif activate:
-        a = 1
-    elif not activate:
-        a = 0
-
-    for i in range(len(act_list)):
-        if act_list[i][1] == ID:
-
-            if a == 1:
-                act_list[i][0] = True
-                return True
-            elif a == 0:
-                return act_list[i][0]
-            elif a == -1:
-                del act_list[i]
-                return False
-
-
-    act_list.append([False, ID])
-
-def delay(bool, t, time, ID, type = True):
-    # retorna True após t segundos depois que bool mudou de False para True
-    def d(t, time, ID):
-        for i in range(len(delay_list)):
-            if delay_list[i][0] == ID:
-                if time - delay_list[i][1] > t:
-                    del delay_list[i]
-                    return type
-                else:
-                    return False
-        delay_list.append([ID, time])
-        return True
-    if bool:
-        bool_d = d(t, time, ID)
-    else:
-        bool_d = False
-    return bool_d
-
-def delay_response(value, T, time, ID):
-    for i in range(len(step_list)):
-        item = delay_list[i]
-        if item[0] == ID:
-            if value == item[1]:
-                return value
-            else:
-                if item[2] == False:
-                    #primeira vez que o valor muda
-                    item[2] = time
-                    return item[1]
-                else:
-                    #transição para o outro valor
-                    t = time - item[2]
-                    if t < T:
-                        return item[1]
-                    else:
-                        step_list[i] = [ID, value, False]
-                        return value
-
-    # primeira vez que a função é chamada (não existe o ID na lista)
-    delay_list.append([ID, value, False])
-    return value
-
-def step_response(value, T, time, ID):
-    for i in range(len(step_list)):
-        item = step_list[i]
-        if item[0] == ID:
-            if item[2] == value and item[2] == item[1]: # se o valor final não mudou
-                return value
-            else: # se é a primeira vez que o valor muda
-                if item[3] == False: # se é o primeiro frame após mudança
-                    item[2] = value
-                    item[3] = time
-                    return item[1]
-                else:  #senão, faz a transição para o outro valor
-                    t = time - item[3]
-                    if t < T:   #se ainta não completou o tempo de transição
-                        Vi = item[1]
-                        Tc = T / 4
-                        Vf = item[2] if item[2] != 0 else 0.0000001
-                        A = Vf
-                        B = Vi * Tc / Vf
-                        t = time - item[3]
-                        current_value = math.exp(-t / Tc) * A * (B / Tc - 1) + A
-                        if value != item[2]:  # se o valor final mudou
-                            item[1] = current_value
-                            item[2] = value
-                            item[3] = time
-
-                        return current_value
-                    else:
-                        step_list[i] = [ID, value, value, False]
-                        return value
-
-    # primeira vez que a função é chamada (não existe o ID na lista)
-    #(ID, V INICIAL, V FINAL, t0)
-    step_list.append([ID, value, value, False])
-    return value
-
 def delete(list, item):
     deleted = False
     i = 0
@@ -213,36 +138,8 @@ def delete(list, item):
                 deleted = True
     return list
 
-def register(nameID, action = 0, a = False, b = False, c = False, d = False):
-    #action:
-    # 0-usar
-    # 1-atualizar
-    # 2-destroir
-    for i in range(len(registered)):
-        if registered[i][0] == nameID:
-            if action == 0:
-                return registered[i][1:]
-            elif action == 1:
-                registered[i] = [nameID, a, b, c, d]
-                return registered[i][1:]
-            elif action == 2:
-                del registered[i][1:]
-                return False
-    # se não achou, cadastrar:
-    registered.append([nameID, a, b, c, d])
-    return registered[-1][1:]
-
-def check_once(bool, ID):
-    if bool:
-        register(ID, 1, True)
-        act = True
-    else:
-        act = register(ID, 0)[0]
-
-    return act
-
 def get_dir(p1, p2 = False):
-    if not p2:
+    if p2 is False:
         return [math.cos(p1 * math.pi / 180), -math.sin(p1 * math.pi / 180)]
     else:
         return norm([p2[0] - p1[0], p2[1] - p1[1]])
@@ -250,56 +147,10 @@ def get_dir(p1, p2 = False):
 def neg(vec):
     return [-vec[0], -vec[1]]
 
-def one_up(ID, reset = False):
-    if ID in oneup_list:
-        if reset:
-            for i in range(len(oneup_list)):
-                if i == ID:
-                    del oneup_list[i]
-        else:
-            return False
-    elif not reset:
-        oneup_list.append(ID)
-        return True
-    else:
-        pass
-
-def history(var, quant, ID):
-    for i in range(len(registered)):
-        item = registered[i]
-        if ID == item[0]:
-            item[2].append(var)
-            if len(item[2]) > quant:
-                del item[2][0]
-            return item[2][::-1]
-
-    values_list = []
-    registered.append([ID, var, values_list])
-    return values_list
-
-def changed(value, ID):
-    for i in range(len(registered)):
-        item = registered[i]
-        if ID == item[0]:
-            if value == item[1]:
-                return False
-            else:
-                registered[i][1] = value
-                return True
-
-    registered.append([ID, value])
-    return value
-
 def interval(t, freq, offset = 0):
     return int(t * 1000 + offset) % freq == 0
 
 
-oneup_list = []
-act_list = []
-wait_list = []
-delay_list = []
-step_list = []
-registered = []
 
 M = 1  # mass unit / kilogram
 L = 100  # pixels / meter
@@ -0,0 +1,22 @@
+class Pool():
+
+    # objetos prontos que voltam para cá quando são destruídos,
+    # em vez de serem criados de novo a cada tiro
+    def __init__(self, create, size=0):
+        self.create = create
+        self.free = []
+        for i in range(size):
+            self.free.append(self.new())
+
+    def new(self):
+        obj = self.create()
+        obj.pool = self
+        return obj
+
+    def acquire(self):
+        if self.free:
+            return self.free.pop()
+        return self.new()
+
+    def release(self, obj):
+        self.free.append(obj)
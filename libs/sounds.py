@@ -0,0 +1,70 @@
+import pygame
+
+
+class Sample():
+
+    # som já decodificado (pelo Assets, no formato do mixer) que toca
+    # pelos canais da sua categoria
+    def __init__(self, bank, sound, category):
+        self.bank = bank
+        self.sound = sound
+        self.category = category
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        return self.bank.play(self, loops, maxtime, fade_ms)
+
+
+class SoundBank():
+
+    # cada categoria tem um número fixo de canais reservados. quando todos
+    # estão tocando, o som mais antigo da categoria é cortado, então uma
+    # rajada de tiros não toma os canais dos passos nem dos socos
+    voices = {'gun': 4, 'impact': 4, 'punch': 3, 'player': 3, 'world': 3, 'effects': 2}
+
+    def __init__(self, assets, voices=None):
+        self.assets = assets
+        self.voices = dict(voices or self.voices)
+        self.samples = {}
+        self.channels = {}
+        self.started = {}
+        self.played = 0
+        self.stolen = 0
+        if not pygame.mixer.get_init():
+            return
+        # os canais do banco vêm antes dos que o mixer já tinha, que continuam
+        # livres para quem tocar um Sound direto
+        total = sum(self.voices.values())
+        pygame.mixer.set_num_channels(total + pygame.mixer.get_num_channels())
+        pygame.mixer.set_reserved(total)
+        i = 0
+        for category, count in self.voices.items():
+            self.channels[category] = [pygame.mixer.Channel(i + k) for k in range(count)]
+            i += count
+
+    def sample(self, path, category='effects'):
+        sample = self.samples.get(path)
+        if sample is None:
+            sample = self.samples[path] = Sample(self, self.assets.sound(path), category)
+        return sample
+
+    def play(self, sample, loops=0, maxtime=0, fade_ms=0):
+        channels = self.channels.get(sample.category)
+        if not channels:
+            return None
+        now = pygame.time.get_ticks()
+        channel = None
+        for c in channels:
+            if not c.get_busy():
+                channel = c
+                break
+        if channel is None:
+            channel = min(channels, key=lambda c: self.started.get(c, 0))
+            self.stolen += 1
+        self.started[channel] = now
+        self.played += 1
+        channel.play(sample.sound, loops, maxtime, fade_ms)
+        return channel
+
+    def report(self):
+        busy = {category: sum(c.get_busy() for c in channels) for category, channels in self.channels.items()}
+        return {'samples': len(self.samples), 'played': self.played, 'stolen': self.stolen, 'busy': busy}
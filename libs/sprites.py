@@ -0,0 +1,47 @@
+from collections import OrderedDict
+import pygame
+
+
+class RotationCache():
+
+    # imagens já giradas, por (superfície, ângulo arredondado, escala). o
+    # ângulo é arredondado para múltiplos de step graus; quando os bytes
+    # passam de budget, saem as usadas há mais tempo
+    def __init__(self, step=1, budget=32 * 1024 * 1024):
+        self.step = step
+        self.turn = round(360 / step)
+        self.budget = budget
+        self.size = 0
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def rotate(self, img, ang, scale=1):
+        k = round(ang / self.step) % self.turn
+        key = (img, k, scale)
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+        self.misses += 1
+        rotated = pygame.transform.rotozoom(img, k * self.step, scale)
+        w, h = rotated.get_size()
+        size = w * h * rotated.get_bytesize()
+        self.items[key] = [rotated, size]
+        self.size += size
+        while self.size > self.budget and len(self.items) > 1:
+            [old, old_size] = self.items.popitem(last=False)[1]
+            self.size -= old_size
+            self.evictions += 1
+        return rotated
+
+    def clear(self):
+        # as cópias giradas seguram as superfícies de origem; saem junto com o nível
+        self.items.clear()
+        self.size = 0
+
+    def report(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'items': len(self.items), 'bytes': self.size}
@@ -0,0 +1,98 @@
+import heapq
+
+
+class Timers():
+
+    # temporizadores indexados por (dono, nome) em dicionários. o dono é o ID
+    # do objeto que usa o temporizador (None para os do jogo); quando o objeto
+    # sai do jogo, release(dono) apaga os dele. os esquecidos por mais de
+    # idle segundos saem pelo heap em expire()
+    def __init__(self, fps=60, idle=10):
+        self.stale = 4 / fps
+        self.idle = idle
+        self.waits = {}
+        self.delays = {}
+        self.flags = {}
+        self.owned = {}
+        self.heap = []
+        self.count = 0
+
+    def own(self, key):
+        keys = self.owned.get(key[0])
+        if keys is None:
+            keys = self.owned[key[0]] = set()
+        keys.add(key)
+
+    def track(self, table, key, time):
+        # item = [início, último uso, entrada no heap]
+        self.own(key)
+        self.count += 1
+        table[key] = [time, time, self.count]
+        heapq.heappush(self.heap, [time + self.idle, self.count, table, key])
+
+    def wait(self, t, time, owner, name):
+        # True depois de t segundos sendo chamado sem parar
+        key = (owner, name)
+        item = self.waits.get(key)
+        if item is None:
+            self.track(self.waits, key, time)
+            return False
+        if time - item[1] < self.stale:
+            item[1] = time
+            return time - item[0] > t
+        del self.waits[key]
+        return False
+
+    def delay(self, condition, t, time, owner, name, type=True):
+        # retorna True após t segundos depois que condition mudou de False para True
+        if not condition:
+            return False
+        key = (owner, name)
+        item = self.delays.get(key)
+        if item is None:
+            self.track(self.delays, key, time)
+            return True
+        item[1] = time
+        if time - item[0] > t:
+            del self.delays[key]
+            return type
+        return False
+
+    def activate(self, activate, owner, name):
+        # -1 apaga, True liga, False só consulta
+        key = (owner, name)
+        if key not in self.flags:
+            self.own(key)
+            self.flags[key] = False
+            return None
+        if activate == -1:
+            del self.flags[key]
+            return False
+        if activate:
+            self.flags[key] = True
+            return True
+        return self.flags[key]
+
+    def release(self, owner):
+        for key in self.owned.pop(owner, ()):
+            self.waits.pop(key, None)
+            self.delays.pop(key, None)
+            self.flags.pop(key, None)
+
+    def expire(self, time):
+        heap = self.heap
+        while heap and heap[0][0] <= time:
+            entry = heapq.heappop(heap)
+            [when, count, table, key] = entry
+            item = table.get(key)
+            if item is None or item[2] != count:
+                continue
+            # foi usado depois de entrar no heap: volta com o prazo novo
+            if item[1] + self.idle > time:
+                entry[0] = item[1] + self.idle
+                heapq.heappush(heap, entry)
+                continue
+            del table[key]
+            keys = self.owned.get(key[0])
+            if keys:
+                keys.discard(key)
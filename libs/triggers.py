@@ -0,0 +1,48 @@
+class Latch():
+
+    # gatilho de posição: liga a primeira vez que a condição é verdadeira
+    # e não desliga mais (o que funcs.check_once fazia procurando o nome)
+    def __init__(self):
+        self.on = False
+
+    def update(self, condition):
+        if condition:
+            self.on = True
+        return self.on
+
+
+class Mover():
+
+    # leva um corpo entre posA e posB no eixo d (0 horizontal, 1 vertical).
+    # o corpo é achado pelo handle, e só é tocado quando a entrada muda ou
+    # enquanto ainda não chegou no fim do caminho
+    def __init__(self, resolve, handle, vel, posA, posB, d):
+        self.resolve = resolve
+        self.handle = handle
+        self.vel = vel
+        self.max = max(posA, posB)
+        self.min = min(posA, posB)
+        self.d = d
+        self.on = None
+        self.moving = True
+
+    def update(self, on):
+        if on == self.on and not self.moving:
+            return
+        obj = self.resolve(self.handle)
+        if not obj:
+            return
+        self.on = on
+        d = self.d
+
+        if obj.pos[d] > self.max:
+            obj.pos[d] = self.max
+        elif obj.pos[d] < self.min:
+            obj.pos[d] = self.min
+
+        obj.vel[d] = self.vel if on else -self.vel
+
+        if (obj.pos[d] <= self.min and obj.vel[d] < 0) or (obj.pos[d] >= self.max and obj.vel[d] > 0):
+            obj.vel[d] = 0
+
+        self.moving = obj.vel[d] != 0
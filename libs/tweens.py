@@ -0,0 +1,113 @@
+import math
+import numpy as np
+
+
+class Tweens():
+
+    # respostas de primeira ordem (o antigo funcs.step_response). cada uma é
+    # uma linha destes arrays, achada por (dono, nome) num dicionário, e todas
+    # as que estão em transição andam juntas em step(), uma vez por frame
+    scalars = ['vi', 'vf', 't0', 'T', 'current']
+    flags = ['moving']
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.count = 0
+        self.free = []
+        self.handles = {}
+        self.owned = {}
+        self.time = None
+        for name in self.scalars:
+            setattr(self, name, np.zeros(capacity))
+        for name in self.flags:
+            setattr(self, name, np.zeros(capacity, bool))
+
+    def grow(self):
+        capacity = self.capacity * 2
+        for name in self.scalars + self.flags:
+            old = getattr(self, name)
+            new = np.zeros(capacity, old.dtype)
+            new[:self.capacity] = old
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def handle(self, owner, name, value):
+        key = (owner, name)
+        h = self.handles.get(key)
+        if h is not None:
+            return h
+        if self.free:
+            h = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow()
+            h = self.count
+            self.count += 1
+        self.handles[key] = h
+        keys = self.owned.get(owner)
+        if keys is None:
+            keys = self.owned[owner] = []
+        keys.append(key)
+        self.vi[h] = value
+        self.vf[h] = value
+        self.moving[h] = False
+        return h
+
+    def release(self, owner):
+        for key in self.owned.pop(owner, ()):
+            h = self.handles.pop(key)
+            self.moving[h] = False
+            self.free.append(h)
+
+    def step(self, time):
+        # valor de todas as transições neste instante, numa conta só
+        self.time = time
+        rows = np.flatnonzero(self.moving[:self.count])
+        if not len(rows):
+            return
+        vi = self.vi[rows]
+        vf = self.vf[rows]
+        Tc = self.T[rows] / 4
+        A = np.where(vf != 0, vf, 0.0000001)
+        B = vi * Tc / A
+        self.current[rows] = np.exp(-(time - self.t0[rows]) / Tc) * A * (B / Tc - 1) + A
+
+    def evaluate(self, h, T, time):
+        # fora do passo do frame (transição que começou agora, T diferente)
+        Tc = T / 4
+        Vi = self.vi.item(h)
+        Vf = self.vf.item(h)
+        A = Vf if Vf != 0 else 0.0000001
+        B = Vi * Tc / A
+        return math.exp(-(time - self.t0.item(h)) / Tc) * A * (B / Tc - 1) + A
+
+    def response(self, value, T, time, owner, name):
+        h = self.handle(owner, name, value)
+        vf = self.vf.item(h)
+        if vf == value and vf == self.vi.item(h):
+            return value
+        if not self.moving.item(h):
+            # primeiro frame depois da mudança
+            self.vf[h] = value
+            self.t0[h] = time
+            self.T[h] = T
+            self.moving[h] = True
+            return self.vi.item(h)
+
+        t0 = self.t0.item(h)
+        if time - t0 >= T:
+            self.vi[h] = value
+            self.vf[h] = value
+            self.moving[h] = False
+            return value
+
+        if time == self.time and t0 != time and T == self.T.item(h):
+            current = self.current.item(h)
+        else:
+            current = self.evaluate(h, T, time)
+        if value != vf:
+            self.vi[h] = current
+            self.vf[h] = value
+            self.t0[h] = time
+        self.T[h] = T
+        return current
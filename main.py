@@ -2,7 +2,6 @@ import pygame
 from pygame.locals import *
 import math
 import random
-import datetime
 from operator import itemgetter
 from math import atan2
 import xlrd
@@ -10,18 +9,35 @@ import os.path
 import numpy as np
 from scipy.spatial import Voronoi
 from libs import funcs
+from libs import broadphase
+from libs import bodies
+from libs import entities
+from libs import chunks
+from libs import pools
+from libs import triggers
+from libs import timers
+from libs import tweens
+from libs import blackboard
+from libs import sprites
+from libs import assets
+from libs import sounds
 from libs.PAdLib import shadow as shadow
 from libs.PAdLib import occluder as occluder
 
 class pygame_engine():
 
-    def __init__(self, dimensions):
+    def __init__(self, dimensions, rotation_step=1, rotation_budget=32 * 1024 * 1024):
         pygame.init()
         pygame.joystick.init()
         self.clock = pygame.time.Clock()
         flags = DOUBLEBUF
         # flags = FULLSCREEN | DOUBLEBUF
         self.gameDisplay = pygame.display.set_mode(dimensions, flags, 16)
+        # sprites girados ficam guardados: objetos parados não giram de novo a cada frame
+        self.rotations = sprites.RotationCache(rotation_step, rotation_budget)
+        self.assets = assets.Assets()
+        # os sons tocam por canais reservados, com limite de vozes por categoria
+        self.sounds = sounds.SoundBank(self.assets)
 
     def update_display(self):
         pygame.display.update()
@@ -37,8 +53,14 @@ class pygame_engine():
     def set_mouse(self, bool):
         pygame.mouse.set_visible(bool)
 
-    def load_img(self, img):
-        return pygame.image.load(img).convert_alpha()
+    def load_img(self, img, cache=True):
+        # cache=False para arquivos que mudam no disco (a captura de tela)
+        if not cache:
+            return pygame.image.load(img).convert_alpha()
+        return self.assets.image(img)
+
+    def load_sound(self, sound, category='effects'):
+        return self.sounds.sample(sound, category)
 
     def fill(self, color):
         self.gameDisplay.fill(color)
@@ -65,29 +87,104 @@ class pygame_engine():
         self.gameDisplay.blit(img, pos)
 
     def play_sound(self, sound, loop = 0, max_time = 0, fade_ms = 0):
-        pygame.mixer.Sound('game_files/sounds/'+ sound + '.wav').play(loop, max_time, fade_ms)
+        self.load_sound('game_files/sounds/'+ sound + '.wav').play(loop, max_time, fade_ms)
 
-    def draw_image(self, obj):
+    def draw_image(self, obj, alpha=1, camera=[0, 0]):
         img = obj.image[0]
-        pos = obj.pos
-        rad_ang = obj.ang
+        [x, y, rad_ang] = obj.lerp(alpha)
+        pos = [x - camera[0], y - camera[1]]
         ang = rad_ang * 180 / math.pi
-        img = pygame.transform.rotozoom(img, ang, 1)
+        img = self.rotations.rotate(img, ang, 1)
         re = img.get_rect()
         position = [pos[0] - re[2] / 2, pos[1] - re[3] / 2]
         self.show(img, position)
 
     def draw_special_image(self, img, pos, rad_ang, max_dist):
         ang = rad_ang * 180 / math.pi
-        img = pygame.transform.rotozoom(img, ang, 0.5)
+        img = self.rotations.rotate(img, ang, 0.5)
         re = img.get_rect()
         offset = (re[2] - max_dist)
         position = [pos[0] - re[2] / 2, pos[1] - re[3] / 2]
         self.gameDisplay.blit(img, pos, (0, 0, 200, max_dist+10))
 
+class Camera():
+
+    # o mundo fica parado: a câmera só é aplicada no render e nas
+    # consultas em coordenadas de tela (mouse, in_scene)
+    def __init__(self, w, h):
+        self.pos = [0, 0]
+        self.w = w
+        self.h = h
+
+    def to_screen(self, p):
+        return [p[0] - self.pos[0], p[1] - self.pos[1]]
+
+    def to_world(self, p):
+        return [p[0] + self.pos[0], p[1] + self.pos[1]]
+
+    def sees(self, box, w_margin=0, h_margin=0):
+        x = self.pos[0]
+        y = self.pos[1]
+        if box[1] < x - w_margin or box[0] > x + self.w + w_margin:
+            return False
+        if box[3] < y - h_margin or box[2] > y + self.h + h_margin:
+            return False
+        return True
+
+class Weapon():
+
+    __slots__ = ['ammo', 'has_weapon', 'using_weapon', 'weapon_rate']
+
+    def __init__(self, ammo=0):
+        self.ammo = ammo
+        self.has_weapon = False
+        self.using_weapon = False
+        self.weapon_rate = 10
+
+class Animation():
+
+    __slots__ = ['lhand_sprite', 'rhand_sprite', 'body_sprite', 'head_sprite', 'foot_sprite', 'foot_accumulator']
+
+    def __init__(self):
+        self.lhand_sprite = [None, None]
+        self.rhand_sprite = [None, None]
+        self.body_sprite = [None, None]
+        self.head_sprite = [None, None]
+        self.foot_sprite = [None, None]
+        self.foot_accumulator = 1
+
 class Object():
 
-    def __init__(self, id, name):
+    # sem __dict__: cada corpo guarda só estes campos. os Mirror ficam em '_nome'
+    __slots__ = ['store', 'row', 'pool', 'name', 'ID', 'type', 'is_player', 'selected', 'collider', 'figure',
+                 'hits', 'is_voronoi', 'parent', 'offset', 'children', 'handle', 'index', 'waiting', 'wait_start', 'allow_rotation',
+                 'visible', 'deletable', 'wait_obj', 'deadly', 'image', 'thickness', 'max_life_time', 'life_time',
+                 'weapon', 'category', 'mask', 'group', 'joined', 'contact_keys', 'hit_keys', 'sleep_time', 'sleep_pose', 'e', 'eu', 'du', 'color',
+                 'radius', 'mass', 'inertia', 'mass_static', 'box', 'light_segments', 'v', 'w', 'p', 'im', 'ii',
+                 '_torque', '_inv_mass', '_inv_inertia', '_static', '_allow_gravity', '_sleeping']
+
+    pos = bodies.Vector('pos')
+    vel = bodies.Vector('vel')
+    ang = bodies.Scalar('ang')
+    ang_vel = bodies.Scalar('ang_vel')
+    force = bodies.Vector('force')
+    torque = bodies.Mirror('torque')
+    inv_mass = bodies.Mirror('inv_mass')
+    inv_inertia = bodies.Mirror('inv_inertia')
+    static = bodies.Mirror('static')
+    allow_gravity = bodies.Mirror('allow_gravity')
+    sleeping = bodies.Mirror('sleeping')
+    prev = bodies.Previous()
+
+    def __init__(self, store, id, name):
+        self.store = store
+        self.row = self.store.add()
+        self.pool = False
+        self.reset(id, name)
+        self.color = funcs.random_color() if not self.static else funcs.colors('light grey')
+
+    def reset(self, id, name):
+        # estado de um corpo recém-criado; os pools chamam isto ao reaproveitar
         self.name = name
         self.ID = id
         self.static = False
@@ -97,7 +194,13 @@ class Object():
         self.figure = False
         self.hits = []
         self.is_voronoi = False
-        self.follows = None
+        self.parent = None
+        self.offset = None
+        self.children = []
+        self.handle = None
+        self.index = 0
+        self.waiting = False
+        self.wait_start = 0
         self.allow_gravity = True
         self.allow_rotation = True
         self.visible = False
@@ -105,43 +208,114 @@ class Object():
         self.wait_obj = False
         self.deadly = False
         self.image = False
-        self.master = False
         self.thickness = 1
         self.max_life_time = math.inf
         self.life_time = 0
-        self.ammo = 0
-        self.exclude_list = []
-        self.rev_count = 0
+        self.weapon = None
+        self.category = broadphase.LEVEL
+        self.mask = broadphase.ALL
+        self.group = 0
+        self.joined = set()
+        self.contact_keys = set()
+        self.hit_keys = set()
         self.pos = [0, 0]
         self.vel = [0, 0]
         self.force = [0, 0]
         self.ang = 0
         self.ang_vel = 0
         self.torque = 0
+        self.sleeping = False
+        self.sleep_time = 0
+        self.sleep_pose = [0, 0, 0]
+        self.prev = False
 
         self.e = 0
         self.eu = 0.3
         self.du = 0.1
 
-        self.color = funcs.random_color() if not self.static else funcs.colors('light grey')
+    def can_sleep(self):
+        return not self.static and not self.is_player and self.parent is None
 
-    def exclude(self, obj):
-        for ID in self.exclude_list:
-            if ID == obj.ID:
-                return False
-        return True
+    def sleep(self):
+        self.sleeping = True
+        self.vel = [0, 0]
+        self.ang_vel = 0
+        self.sleep_pose = [self.pos[0], self.pos[1], self.ang]
+
+    def wake(self):
+        self.sleeping = False
+        self.sleep_time = 0
+
+    def disturbed(self):
+        # algo mexeu no corpo por fora da física enquanto ele dormia
+        p = self.sleep_pose
+        return self.vel[0] or self.vel[1] or self.ang_vel or self.force[0] or self.force[1] or self.torque or \
+            self.pos[0] != p[0] or self.pos[1] != p[1] or self.ang != p[2]
+
+    def lerp(self, alpha):
+        # estado entre os dois últimos passos da física, só para desenhar
+        p = self.prev
+        if not p:
+            return [self.pos[0], self.pos[1], self.ang]
+        return [p[0] + (self.pos[0] - p[0]) * alpha, p[1] + (self.pos[1] - p[1]) * alpha, p[2] + (self.ang - p[2]) * alpha]
+
+    def translate(self, d):
+        self.pos[0] += d[0]
+        self.pos[1] += d[1]
+        p = self.prev
+        if p:
+            self.prev = [p[0] + d[0], p[1] + d[1], p[2]]
+        if self.sleeping:
+            self.sleep_pose[0] += d[0]
+            self.sleep_pose[1] += d[1]
+            self.translate_shape(d)
+
+    def translate_shape(self, d):
+        self.set_box()
+
+    def can_rotate(self):
+        return self.allow_rotation
+
+    def set_inverse(self):
+        self.mass_static = self.static
+        if self.static:
+            self.inv_mass = 0
+            self.inv_inertia = 0
+        else:
+            self.inv_mass = 1 / self.mass
+            self.inv_inertia = 1 / self.inertia
 
     def apply_impulse(self, j, r):
         if not self.static:
             self.vel[0] += j[0] * self.inv_mass
             self.vel[1] += j[1] * self.inv_mass
-            if self.allow_rotation:
+            if self.can_rotate():
                 self.ang_vel += funcs.cross(j, r) * self.inv_inertia
 
+    def begin_solve(self):
+        # o solver trabalha em cópias como listas do python e devolve tudo no fim
+        self.v = self.vel.tolist()
+        self.w = self.ang_vel
+        self.p = self.pos.tolist()
+        self.im = 0 if self.static else self.inv_mass
+        self.ii = self.inv_inertia if self.im and self.can_rotate() else 0
+
+    def solve_impulse(self, j, r):
+        self.v[0] += j[0] * self.im
+        self.v[1] += j[1] * self.im
+        self.w += (j[0] * r[1] - j[1] * r[0]) * self.ii
+
+    def end_solve(self):
+        self.vel = self.v
+        self.ang_vel = self.w
+        self.pos = self.p
+
 class Circle(Object):
 
-    def __init__(self, id, name, r):
-        Object.__init__(self, id, name)
+    __slots__ = ['density']
+
+    def __init__(self, store, id, name, r):
+        Object.__init__(self, store, id, name)
         self.type = 'circle'
         self.radius = r
         self.set_mass()
@@ -152,21 +326,17 @@ class Circle(Object):
         self.mass = self.density * math.pi * self.radius ** 2
         self.inertia = self.mass * self.radius ** 2
         self.set_box()
-        if self.static:
-            self.inv_mass = 0
-            self.inv_inertia = 0
-        else:
-            self.inv_mass = 1 / self.mass
-            self.inv_inertia = 1 / self.inertia
+        self.set_inverse()
 
     def update_all(self):
         self.set_box()
 
     def set_box(self):
-        minX = self.pos[0] - self.radius
-        maxX = self.pos[0] + self.radius
-        minY = self.pos[1] - self.radius
-        maxY = self.pos[1] + self.radius
+        [x, y] = self.pos.tolist()
+        minX = x - self.radius
+        maxX = x + self.radius
+        minY = y - self.radius
+        maxY = y + self.radius
         self.box = [minX, maxX, minY, maxY]
 
     def set_light_segments(self, pos):
@@ -191,38 +361,62 @@ class Circle(Object):
 
 class Poly(Object):
 
-    def __init__(self, id, name, v_list):
-        Object.__init__(self, id, name)
+    __slots__ = ['vertex_pos', 'vertex_count', 'vertex_pose', 'vertex_ang', 'rotated', 'vertex', 'normals',
+                 'tangents', 'local_normals', 'local_tangents', 'centroid']
+
+    def __init__(self, store, id, name, v_list):
+        Object.__init__(self, store, id, name)
         self.type = 'poly'
         self.vertex_pos = v_list
         self.radius = max(funcs.pol(v[0], v[1]) for v in v_list)
         self.vertex_count = len(v_list)
+        self.vertex_pose = None
+        self.vertex_ang = None
         self.set_mass(1)
+        self.set_local()
         self.set_vertex()
         self.set_box()
 
     def set_vertex(self):
-        cos = math.cos(-self.ang)
-        sin = math.sin(-self.ang)
-
-        new_v = [0, 0]
-        vertex = []
-
-        for v in self.vertex_pos:
-            new_v = [v[0] * cos - v[1] * sin + self.pos[0], v[1] * cos + v[0] * sin + self.pos[1]]
-            vertex.append(new_v)
+        # massa e normais locais são calculadas uma vez; aqui só se gira quando
+        # o ângulo muda e se refaz os vértices quando a pose muda
+        if self.static != self.mass_static:
+            self.set_inverse()
+
+        [x, y] = self.pos.tolist()
+        ang = self.ang
+        if self.vertex_pose == [x, y, ang]:
+            return
+
+        if ang != self.vertex_ang:
+            cos = math.cos(-ang)
+            sin = math.sin(-ang)
+            self.rotated = [[v[0] * cos - v[1] * sin, v[1] * cos + v[0] * sin] for v in self.vertex_pos]
+            self.set_normals(cos, sin)
+            self.set_tangents(cos, sin)
+            self.vertex_ang = ang
+        if self.is_player:
+            self.foot = self.normals[-1]
 
-        self.light_segments = self.vertex = vertex
+        self.light_segments = self.vertex = [[v[0] + x, v[1] + y] for v in self.rotated]
+        self.vertex_pose = [x, y, ang]
         self.set_box()
         if self.is_player:
             self.set_touch_box()
-        self.set_mass(1)
-        self.set_normals()
-        self.set_tangents()
 
     def update_all(self):
         self.set_vertex()
 
+    def draw_vertex(self, alpha):
+        [x, y, ang] = self.lerp(alpha)
+        cos = math.cos(-ang)
+        sin = math.sin(-ang)
+        return [[v[0] * cos - v[1] * sin + x, v[1] * cos + v[0] * sin + y] for v in self.vertex_pos]
+
+    def translate_shape(self, d):
+        # corpo dormindo: o ângulo não muda, então só desloca os vértices
+        self.set_vertex()
+
     def set_box(self):
         minX = min(v[0] for v in self.vertex)
         maxX = max(v[0] for v in self.vertex)
@@ -255,31 +449,24 @@ class Poly(Object):
 
         self.mass = area * d
         self.inertia = I * d
+        self.set_inverse()
 
-        if self.static:
-            self.inv_mass = 0
-            self.inv_inertia = 0
-        else:
-            self.inv_mass = 1 / self.mass
-            self.inv_inertia = 1 / self.inertia
-
-    def set_normals(self):
-        v = self.vertex
+    def set_local(self):
+        v = self.vertex_pos
         n = []
-        for i in range(self.vertex_count):
-            j = (i + 1) % self.vertex_count
-            n.append(funcs.norm([v[j][1] - v[i][1], v[i][0] - v[j][0]]))
-        self.normals = n
-        if self.is_player:
-            self.foot = n[-1]
-
-    def set_tangents(self):
-        v = self.vertex
         t = []
         for i in range(self.vertex_count):
             j = (i + 1) % self.vertex_count
+            n.append(funcs.norm([v[j][1] - v[i][1], v[i][0] - v[j][0]]))
             t.append(funcs.norm([v[j][0] - v[i][0], v[j][1] - v[i][1]]))
-        self.tangents = t
+        self.local_normals = n
+        self.local_tangents = t
+
+    def set_normals(self, cos, sin):
+        self.normals = [[n[0] * cos - n[1] * sin, n[1] * cos + n[0] * sin] for n in self.local_normals]
+
+    def set_tangents(self, cos, sin):
+        self.tangents = [[t[0] * cos - t[1] * sin, t[1] * cos + t[0] * sin] for t in self.local_tangents]
 
     def inside(self, p):
 
@@ -292,22 +479,27 @@ class Poly(Object):
 
 class Player(Poly):
 
-    def __init__(self, id, name, v_list):
-        Poly.__init__(self, id, name, v_list)
+    __slots__ = ['life', 'walker', 'jumper', 'in_air', 'stop', 'in_ground', 'ground', 'ground_momentum',
+                 'sliding', 'walking', 'running', 'jumped', 'jump_boost', 'facing_left', 'instant_push',
+                 'shooting', 'punching', 'grabbing', 'grabbed', 't0', 'head', 'larm', 'rarm', 'foot1', 'foot2',
+                 'foot', 'touch_box', 'anim']
+
+    def __init__(self, store, id, name, v_list):
+        Poly.__init__(self, store, id, name, v_list)
+        self.category = broadphase.PLAYER
+        self.group = -(id + 1)
         self.life = 1
-        self.lifes_left = 1
         self.is_player = True
         self.walker = False
         self.jumper = False
-        self.has_weapon = False
-        self.using_weapon = False
+        self.weapon = Weapon()
+        self.anim = Animation()
         self.in_air = False
         self.stop = False
         self.in_ground = False
         self.ground = self
         self.ground_momentum = 0
         self.sliding = False
-        self.weapon_rate = 10
         self.walking = False
         self.running = False
         self.jumped = False
@@ -318,7 +510,6 @@ class Player(Poly):
         self.punching = False
         self.grabbing = False
         self.grabbed = [False, False]
-        self.foot_accumulator = 1
         self.t0 = 0
 
         self.head = False
@@ -327,12 +518,6 @@ class Player(Poly):
         self.foot1 = False
         self.foot2 = False
 
-        self.lhand_sprite = [None, None]
-        self.rhand_sprite = [None, None]
-        self.body_sprite = [None, None]
-        self.head_sprite = [None, None]
-        self.foot_sprite = [None, None]
-
         self.e = 0
         self.eu = 1
         self.du = 1
@@ -363,10 +548,10 @@ class Player(Poly):
             self.image[0] = pygame.transform.flip(self.image[0], True, False)
             self.head.image[0] = pygame.transform.flip(self.head.image[0], True, False)
         if not only_sprite:
-            self.head.follows[1][0] *= -1
+            self.head.offset[0] *= -1
         self.facing_left = not self.facing_left
 
-    def update(self, time, p0, s, g):
+    def update(self, time, p0, s, g, timers, tweens):
 
         def walk_controls():
 
@@ -382,16 +567,16 @@ class Player(Poly):
                 self.change_direction()
 
             if self.walking > 0:
-                tr = funcs.step_response(1, T, time, 'walkingR ' + str(self.ID))
-                tl = funcs.step_response(0, T, time, 'walkingL ' + str(self.ID))
+                tr = tweens.response(1, T, time, self.ID, 'walkingR')
+                tl = tweens.response(0, T, time, self.ID, 'walkingL')
 
             elif self.walking < 0:
-                tr = funcs.step_response(0, T, time, 'walkingR ' + str(self.ID))
-                tl = funcs.step_response(1, T, time, 'walkingL ' + str(self.ID))
+                tr = tweens.response(0, T, time, self.ID, 'walkingR')
+                tl = tweens.response(1, T, time, self.ID, 'walkingL')
 
             else:
-                tr = funcs.step_response(0, T, time, 'walkingR ' + str(self.ID))
-                tl = funcs.step_response(0, T, time, 'walkingL ' + str(self.ID))
+                tr = tweens.response(0, T, time, self.ID, 'walkingR')
+                tl = tweens.response(0, T, time, self.ID, 'walkingL')
 
             self.ang = -0.03 * math.pi / 180 * v * (tr - tl)
 
@@ -402,12 +587,12 @@ class Player(Poly):
 
             condition = True if g else self.in_ground
 
-            if self.jumped and funcs.delay(condition, 0.5, time, 'c'):
+            if self.jumped and timers.delay(condition, 0.5, time, self.ID, 'c'):
                 self.vel[1] = - jump
                 if s:
                     r = random.randrange(0, 2)
                     s[r].play()
-            if funcs.delay(self.jumped, 0.25, time, 'c') and not self.in_ground and self.jump_boost:
+            if timers.delay(self.jumped, 0.25, time, self.ID, 'c') and not self.in_ground and self.jump_boost:
                 self.vel[1] -= jump / 3
                 self.jump_boost = False
             if self.in_ground:
@@ -426,16 +611,16 @@ class Player(Poly):
             T = 0.5
 
             if self.walking > 0:
-                tr = funcs.step_response(1, T, time, 'walkingR ' + str(self.ID))
-                tl = funcs.step_response(0, T, time, 'walkingL ' + str(self.ID))
+                tr = tweens.response(1, T, time, self.ID, 'walkingR')
+                tl = tweens.response(0, T, time, self.ID, 'walkingL')
 
             elif self.walking < 0:
-                tr = funcs.step_response(0, T, time, 'walkingR ' + str(self.ID))
-                tl = funcs.step_response(1, T, time, 'walkingL ' + str(self.ID))
+                tr = tweens.response(0, T, time, self.ID, 'walkingR')
+                tl = tweens.response(1, T, time, self.ID, 'walkingL')
 
             else:
-                tr = funcs.step_response(0, T, time, 'walkingR ' + str(self.ID))
-                tl = funcs.step_response(0, T, time, 'walkingL ' + str(self.ID))
+                tr = tweens.response(0, T, time, self.ID, 'walkingR')
+                tl = tweens.response(0, T, time, self.ID, 'walkingL')
             if 'v' in locals():
                 self.ang = -0.5 * math.pi / 180 * v * (tr - tl)
                 self.vel[0] = g + v * (tr - tl)
@@ -444,7 +629,7 @@ class Player(Poly):
             if int(time * 60 + self.ID * 190) % 200 == 0:
                 self.jumped = True
             jump = 600
-            if self.jumped and funcs.delay(self.in_ground, 0.2, time, 'c' + str(self.ID)):
+            if self.jumped and timers.delay(self.in_ground, 0.2, time, self.ID, 'c'):
                 self.vel[1] -= jump
                 self.jumped = False
 
@@ -457,15 +642,247 @@ class Player(Poly):
             if self.jumper:
                 random_jump()
 
-    def apply_impulse(self, j, r):
-        if not self.static:
-            self.vel[0] += j[0] * self.inv_mass
-            self.vel[1] += j[1] * self.inv_mass
-            if self.stop:
-                self.ang_vel += funcs.cross(j, r) * self.inv_inertia
+    def can_rotate(self):
+        return self.stop
+
+    def parts(self):
+        return [self.head, self.larm, self.rarm, self.foot1, self.foot2]
+
+class Bullet():
+
+    def __init__(self, pos, vel, master, group=0, radius=2, density=10):
+        self.radius = radius
+        self.mass = density * math.pi * radius ** 2
+        self.category = broadphase.BULLET
+        self.mask = broadphase.ALL & ~broadphase.BLOOD
+        self.ID = None
+        self.joined = set()
+        self.color = funcs.colors('yellow')
+        self.max_life_time = 2
+        self.pool = False
+        self.reset(pos, vel, master, group)
+
+    def reset(self, pos, vel, master, group=0):
+        self.pos = pos
+        self.vel = vel
+        self.master = master
+        self.group = group
+        self.life_time = 0
+
+class Contact():
+
+    def __init__(self, A, B, point, normal, pd, share):
+        self.A = A
+        self.B = B
+        self.normal = normal
+        self.tangent = [-normal[1], normal[0]]
+        self.pd = pd
+        self.share = share
+        self.posA = A.pos.tolist()
+        self.posB = B.pos.tolist()
+        self.rA = [point[0] - self.posA[0], point[1] - self.posA[1]]
+        self.rB = [point[0] - self.posB[0], point[1] - self.posB[1]]
+        self.jn = 0
+        self.jt = 0
+
+        if A.is_player or B.is_player:
+            self.e = self.eu = self.du = 0
+        else:
+            self.e = min(A.e, B.e)
+            self.eu = (A.eu + B.eu) / 2
+            self.du = (A.du + B.du) / 2
+
+        n = normal
+        total_sum = A.inv_mass + B.inv_mass + A.inv_inertia * funcs.cross(self.rA, n) ** 2 + B.inv_inertia * funcs.cross(self.rB, n) ** 2
+        total_mass = A.inv_mass + B.inv_mass
+        self.total_sum = total_sum if total_sum != 0 else math.inf
+        self.total_mass = total_mass if total_mass != 0 else math.inf
+
+        rA = self.rA
+        rB = self.rB
+        dv = [B.vel[0] + B.ang_vel * rB[1] - A.vel[0] - A.ang_vel * rA[1],
+              B.vel[1] - B.ang_vel * rB[0] - A.vel[1] + A.ang_vel * rA[0]]
+        vn = funcs.dot(dv, n)
+        self.target = -self.e * vn if vn < 0 else 0
+
+    def relative_velocity(self):
+        A = self.A
+        B = self.B
+        rA = self.rA
+        rB = self.rB
+        return [B.v[0] + B.w * rB[1] - A.v[0] - A.w * rA[1],
+                B.v[1] - B.w * rB[0] - A.v[1] + A.w * rA[0]]
+
+    def apply(self, j):
+        self.A.solve_impulse([-j[0], -j[1]], self.rA)
+        self.B.solve_impulse(j, self.rB)
+
+    def warm_start(self):
+        n = self.normal
+        t = self.tangent
+        self.apply([self.jn * n[0] + self.jt * t[0], self.jn * n[1] + self.jt * t[1]])
+
+    def solve(self):
+        n = self.normal
+        t = self.tangent
+        m = self.total_sum * self.share
+
+        # impulse
+
+        vn = funcs.dot(self.relative_velocity(), n)
+        jn = max(self.jn - (vn - self.target) / m, 0)
+        j = jn - self.jn
+        self.jn = jn
+        self.apply([j * n[0], j * n[1]])
+
+        # friction
+
+        vt = funcs.dot(self.relative_velocity(), t)
+        jt = self.jt - vt / m
+        if abs(jt) > self.eu * self.jn:
+            jt = funcs.signal(jt) * self.du * self.jn
+        j = jt - self.jt
+        self.jt = jt
+        self.apply([j * t[0], j * t[1]])
+
+    def correct(self):
+        n = self.normal
+        A = self.A
+        B = self.B
+        percent = 0.4
+        slop = 0.1
+        # penetração que ainda resta depois das correções anteriores
+        moved = [B.p[0] - self.posB[0] - A.p[0] + self.posA[0], B.p[1] - self.posB[1] - A.p[1] + self.posA[1]]
+        pd = self.pd - funcs.dot(moved, n)
+        cr = percent * max(pd - slop, 0) / (self.total_mass * self.share)
+        correction = [cr * n[0], cr * n[1]]
+
+        A.p[0] -= correction[0] * A.im
+        A.p[1] -= correction[1] * A.im
+        B.p[0] += correction[0] * B.im
+        B.p[1] += correction[1] * B.im
+
+class RevoluteJoint():
+
+    def __init__(self, A, rpA, B, rpB):
+        self.A = A
+        self.B = B
+
+        angA = -A.ang
+        angB = -B.ang
+
+        rA = [rpA[0] * math.cos(angA) - rpA[1] * math.sin(angA), rpA[1] * math.cos(angA) + rpA[0] * math.sin(angA)]
+        rB = [rpB[0] * math.cos(angB) - rpB[1] * math.sin(angB), rpB[1] * math.cos(angB) + rpB[0] * math.sin(angB)]
+        self.rA = rA
+        self.rB = rB
+
+        pA = [A.pos[0] + rA[0], A.pos[1] + rA[1]]
+        pB = [B.pos[0] + rB[0], B.pos[1] + rB[1]]
+        s = 0.1
+        self.bias = [(pA[0] - pB[0]) / s, (pA[1] - pB[1]) / s]
+
+        # massa efetiva 2x2 do ponto de articulação
+        m = A.inv_mass + B.inv_mass
+        iA = A.inv_inertia
+        iB = B.inv_inertia
+        self.k11 = m + iA * rA[1] ** 2 + iB * rB[1] ** 2
+        self.k12 = - iA * rA[0] * rA[1] - iB * rB[0] * rB[1]
+        self.k22 = m + iA * rA[0] ** 2 + iB * rB[0] ** 2
+        self.det = self.k11 * self.k22 - self.k12 ** 2
+
+    def solve(self):
+        A = self.A
+        B = self.B
+        rA = self.rA
+        rB = self.rB
+        dv = [B.v[0] + B.w * rB[1] - A.v[0] - A.w * rA[1],
+              B.v[1] - B.w * rB[0] - A.v[1] + A.w * rA[0]]
+        r0 = self.bias[0] - dv[0]
+        r1 = self.bias[1] - dv[1]
+        j = [(self.k22 * r0 - self.k12 * r1) / self.det, (self.k11 * r1 - self.k12 * r0) / self.det]
+        A.solve_impulse([-j[0], -j[1]], rA)
+        B.solve_impulse(j, rB)
+
+    def correct(self):
+        A = self.A
+        B = self.B
+        rA = self.rA
+        rB = self.rB
+        if not B.static:
+            B.p[0] = A.p[0] + rA[0] - rB[0]
+            B.p[1] = A.p[1] + rA[1] - rB[1]
+        if not A.static:
+            A.p[0] = B.p[0] + rB[0] - rA[0]
+            A.p[1] = B.p[1] + rB[1] - rA[1]
+
+class DistanceJoint():
+
+    def __init__(self, A, rpA, B, rpB, max_dist, sprite=''):
+        self.A = A
+        self.B = B
+        self.max_dist = max_dist
+        self.sprite = sprite
+
+        angA = -A.ang
+        angB = -B.ang
+
+        rA = [rpA[0] * math.cos(angA) - rpA[1] * math.sin(angA), rpA[1] * math.cos(angA) + rpA[0] * math.sin(angA)]
+        rB = [rpB[0] * math.cos(angB) - rpB[1] * math.sin(angB), rpB[1] * math.cos(angB) + rpB[0] * math.sin(angB)]
+        self.rA = rA
+        self.rB = rB
+
+        self.pA = [A.pos[0] + rA[0], A.pos[1] + rA[1]]
+        self.pB = [B.pos[0] + rB[0], B.pos[1] + rB[1]]
+        self.posA = [A.pos[0], A.pos[1]]
+        self.posB = [B.pos[0], B.pos[1]]
+
+        dn = [self.pA[0] - self.pB[0], self.pA[1] - self.pB[1]]
+        n = funcs.norm(dn)
+        self.normal = n
+        s = 0.1
+        self.difference = funcs.dpp(dn) - max_dist
+        self.bias = self.difference / s
+        self.total_sum = A.inv_mass + B.inv_mass + A.inv_inertia * funcs.cross(rA, n) ** 2 + B.inv_inertia * funcs.cross(rB, n) ** 2
+        self.total_mass = A.inv_mass + B.inv_mass
+        self.j = 0
+
+    def solve(self):
+        if self.difference <= 0 or self.total_sum == 0:
+            return
+        A = self.A
+        B = self.B
+        rA = self.rA
+        rB = self.rB
+        n = self.normal
+        dv = [B.v[0] + B.w * rB[1] - A.v[0] - A.w * rA[1],
+              B.v[1] - B.w * rB[0] - A.v[1] + A.w * rA[0]]
+        j = max(self.j + (self.bias - funcs.dot(dv, n)) / self.total_sum, 0)
+        dj = j - self.j
+        self.j = j
+        A.solve_impulse([-dj * n[0], -dj * n[1]], rA)
+        B.solve_impulse([dj * n[0], dj * n[1]], rB)
+
+    def correct(self):
+        if self.difference <= 0 or self.total_mass == 0:
+            return
+        A = self.A
+        B = self.B
+        n = self.normal
+        percent = 0.4
+        slop = 0.1
+        moved = [B.p[0] - self.posB[0] - A.p[0] + self.posA[0], B.p[1] - self.posB[1] - A.p[1] + self.posA[1]]
+        difference = self.difference - funcs.dot(moved, n)
+        cr = percent * max(difference - slop, 0) / self.total_mass
+        A.p[0] -= cr * n[0] * A.im
+        A.p[1] -= cr * n[1] * A.im
+        B.p[0] += cr * n[0] * B.im
+        B.p[1] += cr * n[1] * B.im
 
 class Button():
 
+    # imagens dos menus vêm do mesmo Assets do pygame_engine (a Simulation preenche)
+    assets = None
+
     def __init__(self, name, x, y, double_state = True, is_menu = 0, go_menu = 0):
         self.name = name
         self.is_switch = False
@@ -476,11 +893,11 @@ class Button():
         self.is_menu = is_menu
         self.go_menu = go_menu
         if double_state:
-            self.image1 = pygame.image.load('game_files/images/comum/menu/' + name + '1.png').convert_alpha()
-            self.image2 = pygame.image.load('game_files/images/comum/menu/' + name + '2.png').convert_alpha()
+            self.image1 = self.assets.image('game_files/images/comum/menu/' + name + '1.png')
+            self.image2 = self.assets.image('game_files/images/comum/menu/' + name + '2.png')
             self.image = self.image1
         else:
-            self.image = pygame.image.load('game_files/images/comum/menu/' + name + '.png').convert_alpha()
+            self.image = self.assets.image('game_files/images/comum/menu/' + name + '.png')
 
     def inside(self):
         size = self.image.get_size()
@@ -499,10 +916,10 @@ class Switch(Button):
         self.pos = [x, y]
         self.increment = [0, 0]
         self.boolean = boolean
-        self.on1 = pygame.image.load('game_files/images/comum/menu/on1.png').convert_alpha()
-        self.on2 = pygame.image.load('game_files/images/comum/menu/on2.png').convert_alpha()
-        self.off1 = pygame.image.load('game_files/images/comum/menu/off1.png').convert_alpha()
-        self.off2 = pygame.image.load('game_files/images/comum/menu/off2.png').convert_alpha()
+        self.on1 = self.assets.image('game_files/images/comum/menu/on1.png')
+        self.on2 = self.assets.image('game_files/images/comum/menu/on2.png')
+        self.off1 = self.assets.image('game_files/images/comum/menu/off1.png')
+        self.off2 = self.assets.image('game_files/images/comum/menu/off2.png')
         self.update()
 
     def turn(self):
@@ -525,27 +942,28 @@ class Simulation():
         self.xbox = False
         pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=256)
         self.graphics = pygame_engine([self.screen_w, self.screen_h])
+        Button.assets = self.graphics.assets
 
         #sounds
 
-        self.step_sound = pygame.mixer.Sound('game_files/sounds/step.wav')
+        self.step_sound = self.graphics.load_sound('game_files/sounds/step.wav', 'player')
         self.jump_sound = []
         for i in range(2):
-            self.jump_sound.append(pygame.mixer.Sound('game_files/sounds/jump' + str(i + 1) + '.wav'))
-        self.punch_sound = [pygame.mixer.Sound('game_files/sounds/punch missed 1.wav'), pygame.mixer.Sound('game_files/sounds/punch missed 1.wav')]
-        self.punch_hit_sound = [pygame.mixer.Sound('game_files/sounds/punch1.wav'), pygame.mixer.Sound('game_files/sounds/punch2.wav'), pygame.mixer.Sound('game_files/sounds/punch3.wav')]
-        self.shoot_sound = [pygame.mixer.Sound('game_files/sounds/shoot1.wav'), pygame.mixer.Sound('game_files/sounds/shoot2.wav')]
+            self.jump_sound.append(self.graphics.load_sound('game_files/sounds/jump' + str(i + 1) + '.wav', 'player'))
+        self.punch_sound = [self.graphics.load_sound('game_files/sounds/punch missed 1.wav', 'punch'), self.graphics.load_sound('game_files/sounds/punch missed 1.wav', 'punch')]
+        self.punch_hit_sound = [self.graphics.load_sound('game_files/sounds/punch1.wav', 'punch'), self.graphics.load_sound('game_files/sounds/punch2.wav', 'punch'), self.graphics.load_sound('game_files/sounds/punch3.wav', 'punch')]
+        self.shoot_sound = [self.graphics.load_sound('game_files/sounds/shoot1.wav', 'gun'), self.graphics.load_sound('game_files/sounds/shoot2.wav', 'gun')]
         self.shoot_wall_hit_sound = []
         for i in range(3):
-            self.shoot_wall_hit_sound.append(pygame.mixer.Sound('game_files/sounds/tarmac_0' + str(i+1) + '.wav'))
+            self.shoot_wall_hit_sound.append(self.graphics.load_sound('game_files/sounds/tarmac_0' + str(i+1) + '.wav', 'impact'))
         self.shoot_glass_hit_sound = []
         for i in range(3):
-            self.shoot_glass_hit_sound.append(pygame.mixer.Sound('game_files/sounds/glass_0' + str(i+1) + '.wav'))
-        self.shoot_player_hit_sound = pygame.mixer.Sound('game_files/sounds/shoot_player_hit.wav')
-        self.reload_sound = pygame.mixer.Sound('game_files/sounds/reload.wav')
-        self.noammo_sound = pygame.mixer.Sound('game_files/sounds/noammo.wav')
-        self.switch_weapon_sound = pygame.mixer.Sound('game_files/sounds/switch weapon.wav')
-        self.wood_crack_sound = pygame.mixer.Sound('game_files/sounds/wood crack.wav')
+            self.shoot_glass_hit_sound.append(self.graphics.load_sound('game_files/sounds/glass_0' + str(i+1) + '.wav', 'impact'))
+        self.shoot_player_hit_sound = self.graphics.load_sound('game_files/sounds/shoot_player_hit.wav', 'impact')
+        self.reload_sound = self.graphics.load_sound('game_files/sounds/reload.wav', 'effects')
+        self.noammo_sound = self.graphics.load_sound('game_files/sounds/noammo.wav', 'effects')
+        self.switch_weapon_sound = self.graphics.load_sound('game_files/sounds/switch weapon.wav', 'world')
+        self.wood_crack_sound = self.graphics.load_sound('game_files/sounds/wood crack.wav', 'world')
 
         #sprites
 
@@ -560,6 +978,12 @@ class Simulation():
 
         self.fps = funcs.fps
         self.dt = 1 / self.fps
+        self.frame_dt = self.dt
+        self.timers = timers.Timers(self.fps)
+        # estado dos corpos desta simulação; cada corpo recebe o store ao ser criado
+        self.store = bodies.BodyStore()
+        self.tweens = tweens.Tweens()
+        self.blackboard = blackboard.Blackboard()
         self.grav_ang = -90
         self.grav_scale = 700
         self.frames = 0
@@ -572,6 +996,7 @@ class Simulation():
         self.music_setting = True
         self.soundeffects_setting = True
         self.godmode_setting = False
+        self.broadphase_setting = 'tree'
         self.game_reseted = False
         self.current_scene = 1
         self.saved_scene = 1
@@ -719,14 +1144,14 @@ class Simulation():
         no_xbox_message = False
         while not button_press:
 
-            if funcs.changed(self.music_setting, 'music change'):
+            if self.blackboard.changed(self.music_setting, 'game', 'music change'):
                 if self.music_setting:
                     pygame.mixer.music.unpause()
                 else:
                     pygame.mixer.music.pause()
 
             self.frames += 0.001
-            if funcs.changed(self.xbox, 'xbox change'):
+            if self.blackboard.changed(self.xbox, 'game', 'xbox change'):
                 pygame.joystick.init()
                 if pygame.joystick.get_count() == 0:
                     no_xbox_message = True
@@ -838,7 +1263,7 @@ class Simulation():
             for button in button_list:
                 pos = [button.pos[0] + button.increment[0], button.pos[1] + button.increment[1]]
                 self.graphics.show(button.image, pos)
-            if no_xbox_message and not funcs.wait(0.5, self.frames, 'no xbox message'):
+            if no_xbox_message and not self.timers.wait(0.5, self.frames, None, 'no xbox message'):
                 self.graphics.show(self.no_xbox_message, [700, 400])
 
 
@@ -846,7 +1271,7 @@ class Simulation():
             if button_press == 'resetsave':
                 self.save_game(True)
                 self.game_reseted = True
-            if self.game_reseted and not funcs.wait(0.8, self.frames, 'reset save message'):
+            if self.game_reseted and not self.timers.wait(0.8, self.frames, None, 'reset save message'):
                 self.graphics.show(self.resettoapply_message, [800, 500])
 
             self.graphics.update_display()
@@ -881,9 +1306,7 @@ class Simulation():
                 self.update_deaths()
 
                 self.update_camera()
-                self.update_collisions()
-                self.update_joints()
-                self.update_dynamics()
+                self.update_physics()
 
                 self.update_players()
                 self.update_scene()
@@ -930,7 +1353,7 @@ class Simulation():
 
     def level_end_screen(self):
         pygame.image.save(self.graphics.gameDisplay, 'game_files/images/temp/screenshot.png')
-        img = self.graphics.load_img('game_files/images/temp/screenshot.png')
+        img = self.graphics.load_img('game_files/images/temp/screenshot.png', False)
         img1 = False
 
         if self.GameLost:
@@ -976,11 +1399,22 @@ class Simulation():
         self.GameOver = False
         self.Pause = False
         self.player = False
-        self.camera = False
+        self.camera = Camera(self.screen_w, self.screen_h)
         self.ID = 0
+        # os corpos do nível anterior (e dos pools antigos) são descartados juntos
+        self.store.clear()
         self.end_door = [0,0,0,0]
         self.obj_list = []
         self.wobj_list = []
+        self.obj_dict = {}
+        self.name_dict = {}
+        self.entities = entities.SlotMap()
+        self.hierarchy = []
+        self.level = {}
+        self.chunks = chunks.ChunkMap()
+        self.pools = {'bullet': pools.Pool(lambda: Bullet([0, 0], [0, 0], False), 32),
+                      'blood': pools.Pool(lambda: Circle(self.store, 0, 'blood', 1), 64),
+                      'bullet_ball': pools.Pool(lambda: Circle(self.store, 0, 'bullet_ball', 20), 8)}
         self.bullet_list = []
         self.rev_joint_list = []
         self.dist_joint_list = []
@@ -990,21 +1424,30 @@ class Simulation():
         self.lever_list = []
         self.guns_list = []
         self.hits = []
+        self.contacts = {}
+        self.joints = []
+        self.velocity_iterations = 4
+        self.position_iterations = 2
+        self.step_dt = 1 / 120
+        self.sleep_linear = 10
+        self.sleep_angular = 0.05
+        self.sleep_delay = 0.5
+        self.hit_cache = {}
+        self.broadphase = broadphase.create(self.broadphase_setting)
         self.bullet_hit = False
         y_dict = {1:500, 2:50, 3: 300, 4:350}
         self.voronoi = []
         self.bridge_index = 0
         self.mouse_pos = self.graphics.get_mouse()[0]
         self.t = 0
-        self.current_time = datetime.datetime.now().time().microsecond
-        self.p0 = [0, 0]
+        self.accumulator = 0
+        self.alpha = 1
         self.sprites = []
-        funcs.oneup_list = []
-        funcs.act_list = []
-        funcs.wait_list = []
-        funcs.delay_list = []
-        funcs.step_list = []
-        funcs.registered = []
+        self.timers = timers.Timers(self.fps)
+        self.tweens = tweens.Tweens()
+        self.blackboard.clear_all()
+        self.graphics.assets.drop('game_files/images/level')
+        self.graphics.rotations.clear()
         return y_dict[self.current_scene]
 
     def generate_voronoi(self, name, number=False, r=False):
@@ -1155,7 +1598,6 @@ class Simulation():
 
         rect = self.find_obj(name)
         rect.figure = False
-        pos = rect.pos
         ID = rect.ID
         ver = []
         polygons = []
@@ -1256,6 +1698,7 @@ class Simulation():
             self.obj_list[-1].wait_obj = True
             self.obj_list[-1].thickness = 0
             self.obj_list[-1].is_voronoi = ID
+            self.obj_list[-1].category = broadphase.SHARD
             self.obj_list[-1].color = funcs.colors('light blue')
             vlist.append(self.obj_list[-1])
         self.voronoi.append([ID, vlist])
@@ -1269,20 +1712,52 @@ class Simulation():
 
         def level_2():
             self.current_music = 'music123'
-            self.add_button([3940, 200], 'hor')
-            self.add_button([4860, 540], 'ver')
-            self.add_button([4860, 200], 'rot')
-            self.add_button([7690, 500], 'wall')
+            mover = self.add_mover
+            handle = self.get_handle
+            self.level = {'hor': self.add_button([3940, 200], 'hor'),
+                          'ver': self.add_button([4860, 540], 'ver'),
+                          'rot': self.add_button([4860, 200], 'rot'),
+                          'wall': self.add_button([7690, 500], 'wall'),
+                          'spinners': [[handle('ac1'), -40 * math.pi / 180], [handle('ac2'), 40 * math.pi / 180]],
+                          'elevator': mover('ap1', 50, 470, 590, 1),
+                          'hor movers': [mover('ap2', 300, 3560, 4320, 0), mover('ap3', 300, 3560, 4320, 0),
+                                         mover('ap4', 120, 3840, 4040, 0), mover('ap9', -300, 5380, 5740, 0)],
+                          'ver movers': [mover('ap5', -300, 340, 700, 1), mover('ap6', -300, 340, 700, 1)],
+                          'rotors': [[handle('ap7'), self.find_obj('ap7').ang], [handle('ap8'), self.find_obj('ap8').ang]],
+                          # cada gatilho abre/fecha um par de portas depois que os inimigos do trecho morrem
+                          'enemies': [[handle('e2'), handle('e3'), handle('e4')], [handle('e5')],
+                                      [handle('e6'), handle('e7')], [handle('e8'), handle('e9'), handle('e10')]],
+                          'acts': [[triggers.Latch(), 6520], [triggers.Latch(), 6800], [triggers.Latch(), 7080], [triggers.Latch(), 7360]],
+                          'doors': [[mover('ap10', 200, -60, 240, 1), mover('ap11', 200, 580, 880, 1)],
+                                    [mover('ap12', 200, -60, 240, 1), mover('ap13', 200, 580, 880, 1)],
+                                    [mover('ap14', 200, -60, 240, 1), mover('ap15', 200, 580, 880, 1)],
+                                    [mover('ap16', 200, -60, 240, 1), mover('ap17', 200, 580, 880, 1)]],
+                          'gate': mover('at1', 200, 180, 340, 1),
+                          'wall mover': mover('ap18', 800, 100, 240, 1)}
 
         def level_3():
             self.current_music = 'music123'
             self.light_list.append([[8000, 150], funcs.colors('white'), 80, 1000, 4, False])
+            handle = self.get_handle
+            self.level = {'platforms': [[handle('ap1'), 0, 400, 2], [handle('ap2'), math.pi, 300, 3], [handle('ap3'), 0, 200, 4]],
+                          'spinners': [[handle('ac1'), -60], [handle('ac2'), 60], [handle('ac3'), -60]],
+                          # [gatilho, plataforma, suporte, espera, ponta, comprimento, espera, ponta, comprimento]
+                          'falls': [[triggers.Latch(), handle('mp1'), 'ic1', 0.3, [-80, -5], 215, 0.8, [80, -5], 230],
+                                    [triggers.Latch(), handle('mp2'), 'ic2', 0.3, [-80, -5], 215, 0.7, [80, -5], 230],
+                                    [triggers.Latch(), handle('mp3'), 'ic3', 0.2, [80, -5], 230, 0.9, [-80, -5], 215]]}
 
         def level_4():
             self.current_music = 'music45'
+            self.velocity_iterations = 8
+            self.position_iterations = 3
             bridge = self.graphics.load_img('game_files/images/level' + str(self.current_scene) + '/objetos/ponte.png')
             self.add_bridge([1760, 260], [2340, 260], 4, bridge, 0)
-            pass
+            handle = self.get_handle
+            self.level = {'ap': [False] + [handle('ap' + str(i + 1)) for i in range(3)],
+                          'ip': [False] + [handle('ip' + str(i + 1)) for i in range(10)],
+                          'ic': [handle('ic1'), handle('ic2')],
+                          'bridge end': handle('bridge1 end'),
+                          'acts': [triggers.Latch(), triggers.Latch(), triggers.Latch()]}
 
         def level_5():
             pass
@@ -1495,11 +1970,12 @@ class Simulation():
         if self.current_scene == 6:
             level_6()
 
+        self.broadphase.bake(self.obj_list + self.wobj_list)
+
     def correct_positions(self, start_pos=0):
-        for obj in self.obj_list + self.wobj_list:
-            if not obj.name == 'main':
-                obj.pos[0] -= start_pos
-        self.p0[0] -= start_pos
+        # o nível fica onde está; a câmera e o jogador começam em start_pos
+        self.player.pos[0] += start_pos - self.camera.pos[0]
+        self.camera.pos[0] = start_pos
 
     # adicionar items
 
@@ -1508,20 +1984,40 @@ class Simulation():
         objB = self.find_obj(nameB)
         if objB and objA:
             rpB = [objA.pos[0] + rpA[0] - objB.pos[0], objA.pos[1] + rpA[1] - objB.pos[1]]
-            objA.exclude_list.append(objB.ID)
-            self.rev_joint_list.append([nameA, rpA, nameB, rpB, K])
+            # corpos ligados pela junta não colidem entre si (só o par, os
+            # grupos de cada um continuam como estão)
+            objA.joined.add(objB.ID)
+            objB.joined.add(objA.ID)
+            self.rev_joint_list.append([nameA, rpA, nameB, rpB, K, objA.handle, objB.handle])
 
     def dist_joint(self, nameA, rpA, nameB, rpB, max_dist, sprite = ''):
-        self.dist_joint_list.append([nameA, rpA, nameB, rpB, max_dist, sprite])
+        self.dist_joint_list.append([nameA, rpA, nameB, rpB, max_dist, sprite, False, False])
+
+    def joint_bodies(self, joint, iA, iB):
+        # os nomes só são resolvidos na primeira vez; depois valem os handles,
+        # que deixam de achar o corpo quando ele é destruído
+        for i, name in [[iA, joint[0]], [iB, joint[2]]]:
+            if not joint[i]:
+                obj = self.find_obj(name)
+                if obj:
+                    joint[i] = obj.handle
+        if not joint[iA] or not joint[iB]:
+            return False, False
+        return self.entities.get(joint[iA]), self.entities.get(joint[iB])
 
     def add_lever(self, pos, name):
         self.add_rect(pos[0], pos[1] - 5, 50, 10, 0, True, False)
+        base = self.obj_list[-1]
         self.add_circle(pos[0] - 25, pos[1] - 50, 10, 0, False, True, name)
         self.obj_list[-1].allow_gravity = False
-        self.obj_list[-1].exclude_list.append(self.player.ID)
+        # só o jogador principal atravessa a alavanca
+        self.obj_list[-1].joined.add(self.player.ID)
+        # [nome, handle da alavanca, handle da base]
+        return [name, self.obj_list[-1].handle, base.handle]
 
     def add_button(self, pos, name, dist=70):
         self.add_rect(pos[0], pos[1] - 10, dist + 20, 20, 0, True, True)
+        base = self.obj_list[-1]
         image1 = self.graphics.load_img('game_files/images/comum/button_1.png')
         image2 = self.graphics.load_img('game_files/images/comum/button_2.png')
         self.obj_list[-1].image = [image2, 0.2]
@@ -1530,6 +2026,11 @@ class Simulation():
         self.obj_list[-1].e = 0
         self.obj_list[-1].color = funcs.colors('red')
         self.obj_list[-1].allow_gravity = False
+        # [nome, handle do botão, handle da base, pode voltar]
+        return [name, self.obj_list[-1].handle, base.handle, True]
+
+    def add_mover(self, name, vel, posA, posB, d):
+        return triggers.Mover(self.resolve_moving, self.get_handle(name), vel, posA, posB, d)
 
     def add_bridge(self, p1, p2, q, img, dl=10):
         d = funcs.dpp(p1, p2)
@@ -1570,7 +2071,7 @@ class Simulation():
         wait_obj = False
         if not name:
             name = 'enemy' + str(self.ID)
-        player = Player(self.ID, name, v_list)
+        player = Player(self.store, self.ID, name, v_list)
         player.static = False
         player.collider = True
         player.visible = True
@@ -1578,19 +2079,19 @@ class Simulation():
         player.thickness = 0
         player.color = funcs.colors('light blue')
         player.wait_obj = wait_obj
-        self.obj_list.append(player)
+        self.add_obj(player)
         self.ID += 1
         player.set_vertex()
         if weapon == -1:
-            player.using_weapon = random.random() > 0.5
+            player.weapon.using_weapon = random.random() > 0.5
         else:
-            player.using_weapon = weapon
+            player.weapon.using_weapon = weapon
 
-        if player.using_weapon:
-            player.ammo = 30
-            player.has_weapon = True
-            player.using_weapon = True
-            player.weapon_rate = weapon
+        if player.weapon.using_weapon:
+            player.weapon.ammo = 30
+            player.weapon.has_weapon = True
+            player.weapon.using_weapon = True
+            player.weapon.weapon_rate = weapon
 
         if jump == -1:
             player.jumper = random.random() > 0.5
@@ -1606,34 +2107,37 @@ class Simulation():
         elif not walk:
             player.walker = False
 
-        head = Circle(self.ID, 'head', 30)
+        head = Circle(self.store, self.ID, 'head', 30)
         head.pos = [0, 0]
-        head.exclude_list.append(player.ID)
+        head.category = broadphase.LIMB
+        head.group = player.group
         head.color = funcs.colors('light red')
         head.static = True
         head.collider = True
         head.visible = True
         head.thickness = 0
         head.wait_obj = wait_obj
-        self.obj_list.append(head)
+        self.add_obj(head)
         self.ID += 1
 
-        larm = Circle(self.ID, 'l_arm', 10)
+        larm = Circle(self.store, self.ID, 'l_arm', 10)
         larm.set_mass(10)
         larm.color = funcs.colors('light green')
-        larm.exclude_list.append(player.ID)
+        larm.category = broadphase.LIMB
+        larm.group = player.group
         larm.wait_obj = wait_obj
         self.arm_list.append(self.ID)
-        self.obj_list.append(larm)
+        self.add_obj(larm)
         self.ID += 1
 
-        rarm = Circle(self.ID, 'r_arm', 10)
+        rarm = Circle(self.store, self.ID, 'r_arm', 10)
         rarm.set_mass(10)
         rarm.color = funcs.colors('light green')
-        rarm.exclude_list.append(player.ID)
+        rarm.category = broadphase.LIMB
+        rarm.group = player.group
         rarm.wait_obj = wait_obj
         self.arm_list.append(self.ID)
-        self.obj_list.append(rarm)
+        self.add_obj(rarm)
         self.ID += 1
 
         wf = 10
@@ -1644,16 +2148,16 @@ class Simulation():
         p4 = [wf, hf]
         v_list = [p1, p2, p3, p4]
 
-        foot1 = Poly(self.ID, 'foot1', v_list)
+        foot1 = Poly(self.store, self.ID, 'foot1', v_list)
         foot1.color = funcs.colors('blue')
         foot1.wait_obj = wait_obj
-        self.obj_list.append(foot1)
+        self.add_obj(foot1)
         self.ID += 1
 
-        foot2 = Poly(self.ID, 'foot2', v_list)
+        foot2 = Poly(self.store, self.ID, 'foot2', v_list)
         foot2.color = funcs.colors('blue')
         foot2.wait_obj = wait_obj
-        self.obj_list.append(foot2)
+        self.add_obj(foot2)
         self.ID += 1
 
         for i in range(4):
@@ -1664,11 +2168,11 @@ class Simulation():
             self.obj_list[-(i + 1)].pos = [0, 0]
             self.obj_list[-(i + 1)].thickness = 0
 
-        self.add_follower('head', name, [-w2 * 0.2, -h2 * 1.7])
-        self.add_follower('l_arm', name, [-w2, 0])
-        self.add_follower('r_arm', name, [w2, 0])
-        self.add_follower('foot1', name, [0, h2 - 4])
-        self.add_follower('foot2', name, [0, h2 - 4])
+        self.add_follower(head, player, [-w2 * 0.2, -h2 * 1.7])
+        self.add_follower(larm, player, [-w2, 0])
+        self.add_follower(rarm, player, [w2, 0])
+        self.add_follower(foot1, player, [0, h2 - 4])
+        self.add_follower(foot2, player, [0, h2 - 4])
 
         player.head = head
         player.larm = larm
@@ -1687,10 +2191,10 @@ class Simulation():
             'foot2': [self.graphics.load_img('game_files/images/comum/inimigos/foot'+ str(n) + '.png'), 1]
         }
 
-        player.lhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/inimigos/back_hand' + str(n) + '.png'), -0.5]
-        player.lhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/inimigos/back_hand' + str(n) + '_gun.png'), -0.5]
-        player.rhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/inimigos/front_hand' + str(n) + '.png'), 1]
-        player.rhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/inimigos/front_hand' + str(n) + '_gun.png'), 1]
+        player.anim.lhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/inimigos/back_hand' + str(n) + '.png'), -0.5]
+        player.anim.lhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/inimigos/back_hand' + str(n) + '_gun.png'), -0.5]
+        player.anim.rhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/inimigos/front_hand' + str(n) + '.png'), 1]
+        player.anim.rhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/inimigos/front_hand' + str(n) + '_gun.png'), 1]
 
         for i in range(6):
             obj = self.obj_list[-(i + 1)]
@@ -1708,11 +2212,11 @@ class Simulation():
         v_list = [p1, p2, p3, p4]
         name = 'main'
 
-        player = Player(self.ID, name, v_list)
+        player = Player(self.store, self.ID, name, v_list)
         player.static = False
         player.collider = True
         player.pos = [x, y]
-        self.obj_list.append(player)
+        self.add_obj(player)
         self.ID += 1
         player.set_vertex()
         player.thickness = 0
@@ -1720,30 +2224,33 @@ class Simulation():
         player.color = funcs.colors('orange')
         self.player = player
 
-        head = Circle(self.ID, 'main_head', 25)
+        head = Circle(self.store, self.ID, 'main_head', 25)
         head.pos = [0, 0]
-        head.exclude_list.append(player.ID)
+        head.category = broadphase.LIMB
+        head.group = player.group
         head.color = funcs.colors('light red')
         head.static = True
         head.collider = True
-        self.obj_list.append(head)
+        self.add_obj(head)
         self.ID += 1
 
-        larm = Circle(self.ID, 'l_arm', 10)
+        larm = Circle(self.store, self.ID, 'l_arm', 10)
         larm.pos = [0, 0]
         larm.set_mass(10)
-        larm.exclude_list.append(player.ID)
+        larm.category = broadphase.LIMB
+        larm.group = player.group
         larm.color = funcs.colors('light green')
         self.arm_list.append(self.ID)
-        self.obj_list.append(larm)
+        self.add_obj(larm)
         self.ID += 1
 
-        rarm = Circle(self.ID, 'r_arm', 10)
+        rarm = Circle(self.store, self.ID, 'r_arm', 10)
         rarm.set_mass(10)
-        rarm.exclude_list.append(player.ID)
+        rarm.category = broadphase.LIMB
+        rarm.group = player.group
         rarm.color = funcs.colors('light green')
         self.arm_list.append(self.ID)
-        self.obj_list.append(rarm)
+        self.add_obj(rarm)
         self.ID += 1
 
         wf = 10
@@ -1754,14 +2261,14 @@ class Simulation():
         p4 = [wf, hf]
         v_list = [p1, p2, p3, p4]
 
-        foot1 = Poly(self.ID, 'foot1', v_list)
+        foot1 = Poly(self.store, self.ID, 'foot1', v_list)
         foot1.color = funcs.colors('blue')
-        self.obj_list.append(foot1)
+        self.add_obj(foot1)
         self.ID += 1
 
-        foot2 = Poly(self.ID, 'foot2', v_list)
+        foot2 = Poly(self.store, self.ID, 'foot2', v_list)
         foot2.color = funcs.colors('blue')
-        self.obj_list.append(foot2)
+        self.add_obj(foot2)
         self.ID += 1
 
         for i in range(4):
@@ -1772,11 +2279,11 @@ class Simulation():
             self.obj_list[-(i + 1)].pos = [0, 0]
             self.obj_list[-(i + 1)].thickness = 0
 
-        self.add_follower('main_head', name, [-w2 * 0.2, -h2 * 1.8])
-        self.add_follower('l_arm', name, [-w2, 0])
-        self.add_follower('r_arm', name, [w2, 0])
-        self.add_follower('foot1', name, [0, h2 - 4])
-        self.add_follower('foot2', name, [0, h2 - 4])
+        self.add_follower(head, player, [-w2 * 0.2, -h2 * 1.8])
+        self.add_follower(larm, player, [-w2, 0])
+        self.add_follower(rarm, player, [w2, 0])
+        self.add_follower(foot1, player, [0, h2 - 4])
+        self.add_follower(foot2, player, [0, h2 - 4])
 
         player.head = head
         player.larm = larm
@@ -1784,32 +2291,35 @@ class Simulation():
         player.foot1 = foot1
         player.foot2 = foot2
 
-        player.lhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/back_hand.png'), -0.5]
-        player.lhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/back_hand_gun.png'), -0.5]
-        player.rhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/front_hand.png'), 1]
-        player.rhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/front_hand_gun.png'), 1]
-        player.body_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/body.png'), 1]
-        player.body_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/body_god.png'), 1]
-        player.head_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/head.png'), 1]
-        player.head_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/head_god.png'), 1]
-        player.foot_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/foot.png'), 1]
-        player.foot_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/foot_god.png'), 1]
+        player.anim.lhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/back_hand.png'), -0.5]
+        player.anim.lhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/back_hand_gun.png'), -0.5]
+        player.anim.rhand_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/front_hand.png'), 1]
+        player.anim.rhand_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/front_hand_gun.png'), 1]
+        player.anim.body_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/body.png'), 1]
+        player.anim.body_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/body_god.png'), 1]
+        player.anim.head_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/head.png'), 1]
+        player.anim.head_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/head_god.png'), 1]
+        player.anim.foot_sprite[0] = [self.graphics.load_img('game_files/images/comum/player/foot.png'), 1]
+        player.anim.foot_sprite[1] = [self.graphics.load_img('game_files/images/comum/player/foot_god.png'), 1]
 
         for i in range(6):
             obj = self.obj_list[-(i + 1)]
             obj.visible = False
 
-    def add_follower(self, nameA, nameB, p=False):
-        for obj in self.obj_list:
-            if nameA == obj.name:
-                a = obj
-            if nameB == obj.name:
-                b = obj
+    def add_follower(self, a, b, p=False):
+        # a passa a ser filho de b, deslocado de p no referencial de b
         if p:
             rel_pos = p
         else:
             rel_pos = [b.pos[0] - a.pos[0], b.pos[1] - a.pos[1]]
-        a.follows = [nameB, rel_pos]
+        a.parent = b.handle
+        a.offset = rel_pos
+        b.children.append(a.handle)
+        root = b
+        while root.parent is not None and self.entities.get(root.parent):
+            root = self.entities.get(root.parent)
+        if root.handle not in self.hierarchy:
+            self.hierarchy.append(root.handle)
 
     def add_circle(self, x, y, r, ang=0, static=False, collider=True, name='', d=1, list=1):
         if list == 1:
@@ -1818,39 +2328,58 @@ class Simulation():
             list = self.wobj_list
         if list == 3:
             list = self.bullet_list
-        new_obj = Circle(self.ID, name, r)
+        new_obj = Circle(self.store, self.ID, name, r)
         new_obj.pos = [x, y]
         new_obj.ang = ang
         new_obj.static = static
         new_obj.collider = collider
         new_obj.set_mass(d)
         new_obj.color = funcs.random_color() if not static else funcs.colors('light grey')
-        self.obj_list.append(new_obj)
+        self.add_obj(new_obj)
         self.ID += 1
         return new_obj.ID
 
+    def spawn_circle(self, name, x, y, r, ang=0, static=False, collider=True, d=1, category=broadphase.LEVEL):
+        # como add_circle, mas o corpo sai do pool com esse nome
+        new_obj = self.pools[name].acquire()
+        new_obj.reset(self.ID, name)
+        new_obj.category = category
+        new_obj.radius = r
+        new_obj.pos = [x, y]
+        new_obj.ang = ang
+        new_obj.static = static
+        new_obj.collider = collider
+        new_obj.set_mass(d)
+        # a caixa ainda é a da vida anterior do corpo
+        new_obj.set_box()
+        self.add_obj(new_obj)
+        self.ID += 1
+        return new_obj
+
     def add_gun(self, pos, ammo = 30):
         v_list = [[-13, 23], [-14, 10], [4, -20], [14, -22], [14, 18]]
         self.add_poly(pos[0], pos[1], v_list, False, True, 'gun')
         gun = self.obj_list[-1]
         gun.image = [self.graphics.load_img('game_files/images/comum/gun.png'), 1]
-        gun.ammo = ammo
+        gun.weapon = Weapon(ammo)
         gun.vel[1] = 0
         gun.ang_vel = 0
+        gun.category = broadphase.ITEM
+        # os jogadores que já estão na fase atravessam a arma
         for obj in self.obj_list:
             if obj.is_player:
-                gun.exclude_list.append(obj.ID)
+                gun.joined.add(obj.ID)
         self.guns_list.append(gun)
 
     def add_poly(self, x, y, v_list, static=False, collider=True, name='', d=1):
 
-        new_obj = Poly(self.ID, name, v_list)
+        new_obj = Poly(self.store, self.ID, name, v_list)
         new_obj.static = static
         new_obj.collider = collider
         new_obj.pos = [x, y]
         new_obj.ang = 0
         new_obj.color = funcs.random_color() if not static else funcs.colors('light grey')
-        self.obj_list.append(new_obj)
+        self.add_obj(new_obj)
         self.ID += 1
         new_obj.set_vertex()
 
@@ -1865,13 +2394,13 @@ class Simulation():
         p4 = [w2, h2]
         v_list = [p1, p2, p3, p4]
 
-        new_obj = Poly(self.ID, name, v_list)
+        new_obj = Poly(self.store, self.ID, name, v_list)
         new_obj.static = static
         new_obj.collider = collider
         new_obj.pos = [x, y]
         new_obj.ang = ang
         new_obj.color = funcs.random_color() if not static else funcs.colors('light grey')
-        self.obj_list.append(new_obj)
+        self.add_obj(new_obj)
         self.ID += 1
         new_obj.set_vertex()
 
@@ -1897,13 +2426,13 @@ class Simulation():
         static = True
         collider = True
 
-        new_obj = Poly(self.ID, name, v_list)
+        new_obj = Poly(self.store, self.ID, name, v_list)
         new_obj.static = static
         new_obj.collider = collider
         new_obj.pos = [x, y]
         new_obj.ang = 0
         new_obj.color = funcs.random_color() if not static else funcs.colors('light grey')
-        self.obj_list.append(new_obj)
+        self.add_obj(new_obj)
         self.ID += 1
         new_obj.set_vertex()
 
@@ -1935,13 +2464,13 @@ class Simulation():
         static = True
         collider = True
 
-        new_obj = Poly(self.ID, name, v_list)
+        new_obj = Poly(self.store, self.ID, name, v_list)
         new_obj.static = static
         new_obj.collider = collider
         new_obj.pos = [x, y]
         new_obj.ang = 0
         new_obj.color = funcs.random_color() if not static else funcs.colors('light grey')
-        self.obj_list.append(new_obj)
+        self.add_obj(new_obj)
         self.ID += 1
         new_obj.set_vertex()
 
@@ -1956,13 +2485,13 @@ class Simulation():
 
         v_list = [p1, p2, p3]
 
-        new_obj = Poly(self.ID, name, v_list)
+        new_obj = Poly(self.store, self.ID, name, v_list)
         new_obj.static = static
         new_obj.collider = collider
         new_obj.pos = [x, y]
         new_obj.ang = ang
         new_obj.color = funcs.random_color() if not static else funcs.colors('light grey')
-        self.obj_list.append(new_obj)
+        self.add_obj(new_obj)
         self.ID += 1
         new_obj.set_vertex()
 
@@ -1978,20 +2507,19 @@ class Simulation():
         self.hits_sprites = []
         self.player_axis_vel = 0
 
+        mouse = self.camera.to_world(self.mouse_pos)
         for obj in self.obj_list:
             obj.hits = []
             obj.life_time += self.dt
-            if obj.type == 'poly':
-                obj.set_vertex()
-            if obj.inside(self.mouse_pos):
+            if obj.inside(mouse):
                 obj.selected = True
             else:
                 obj.selected = False
-        for wobj in self.wobj_list:
-            wobj.life_time += self.dt
         self.t += self.dt
+        self.timers.expire(self.t)
+        self.tweens.step(self.t)
 
-        if funcs.changed(self.music_setting, 'music set'):
+        if self.blackboard.changed(self.music_setting, 'level', 'music set'):
             if self.music_setting:
                 pygame.mixer.music.unpause()
             else:
@@ -2000,39 +2528,46 @@ class Simulation():
         if self.godmode_setting:
             self.player.life = 1
 
-        ct2 = datetime.datetime.now().time().microsecond
-        n = 1 / (ct2 - self.current_time) * 1000000
-        self.fps_now = funcs.clamp(n, 30, 60)
+        # tempo real do último frame: a física consome até 0.1 s em passos
+        # fixos; o resto do jogo continua com o dt limitado entre 1/60 e 1/30
+        frame_time = self.graphics.clock.get_time() / 1000
+        self.frame_dt = min(frame_time, 0.1) if frame_time > 0 else 1 / self.fps
+        self.fps_now = funcs.clamp(1 / self.frame_dt, 30, 60)
         self.dt = 1 / self.fps_now
         self.frames += 0.001
-        self.current_time = datetime.datetime.now().time().microsecond
 
     def update_wobj(self):
-        limit = 1
-        for wobj in self.wobj_list:
-            wobj.update_all()
-            if wobj.box[0] < self.screen_w * limit and wobj.box[1] > self.screen_w * (1 - limit):
-                self.obj_list.append(wobj)
-                self.destroy_obj(wobj.ID, True)
-
-        for obj in self.obj_list:
-            obj.update_all()
-            if obj.wait_obj and (obj.box[0] > self.screen_w * limit or obj.box[1] < self.screen_w * (1 - limit)):
-                self.wobj_list.append(obj)
-                self.destroy_obj(obj.ID, False)
+        # as faixas que a câmera vê acordam; um objeto só volta a esperar
+        # quando sai também das faixas vizinhas (histerese de uma faixa).
+        # objetos em espera não custam nada por frame
+        x = self.camera.pos[0]
+        k0, k1 = self.chunks.span(x, x + self.screen_w)
+        for wobj in self.chunks.wake(k0, k1):
+            if wobj.waiting and self.obj_dict.get(wobj.ID) is wobj:
+                wobj.life_time += self.t - wobj.wait_start
+                self.move_obj(wobj, False)
+
+        for obj in list(self.obj_list):
+            if not obj.sleeping:
+                obj.update_all()
+            if obj.wait_obj and self.chunks.outside(obj, k0 - 1, k1 + 1):
+                self.move_obj(obj, True)
+                obj.wait_start = self.t
+                self.chunks.store(obj)
 
     def update_scene(self):
 
         def level_1():
-            self.end_door = [self.p0[0] + 6720, self.p0[0] + 6780, self.p0[1] + 560, self.p0[1] + 660]
+            self.end_door = [6720, 6780, 560, 660]
             pass
 
         def level_2():
 
-            self.end_door = [self.p0[0] + 7880, self.p0[0] + 7940, self.p0[1] + 240, self.p0[1] + 340]
+            self.end_door = [7880, 7940, 240, 340]
+            level = self.level
+            get = self.resolve_moving
 
-            def circulate(obj, time, center, max_ang, follow_ang=True):
-                first_ang = funcs.register('circulate' + str(obj.ID), 0, obj.ang)[0]
+            def circulate(obj, first_ang, time, center, max_ang, follow_ang=True):
                 if funcs.signal(first_ang - max_ang) == funcs.signal(obj.ang - max_ang):
                     ang_vel = max_ang * self.dt / time
 
@@ -2051,226 +2586,158 @@ class Simulation():
                         obj.ang -= ang_vel
 
             t1 = 0.1
-            t = 5
-            hor = self.get_button('hor', 5, t1)
-            ver = self.get_button('ver', 3, t1)
-            rot = self.get_button('rot', 7, t1)
-            wall = self.get_button('wall', 0, 0)
-
-            ap_obj = [False]
-            for i in range(18):
-                ap_obj.append(self.find_obj('ap' + str(i + 1)))
-
-            ac_obj = [False]
-            for i in range(2):
-                ac_obj.append(self.find_obj('ac' + str(i + 1)))
-
-            at_obj = self.find_obj('at1')
-
-            ac_obj[1].ang_vel = -40 * math.pi / 180
-            ac_obj[2].ang_vel = 40 * math.pi / 180
-
-            e2 = self.find_obj('e2')
-            e3 = self.find_obj('e3')
-            e4 = self.find_obj('e4')
-            e5 = self.find_obj('e5')
-            e6 = self.find_obj('e6')
-            e7 = self.find_obj('e7')
-            e8 = self.find_obj('e8')
-            e9 = self.find_obj('e9')
-            e10 = self.find_obj('e10')
-
-            e = not (not e2 and not e3 and not e4)
-
-            self.translade(ap_obj[1].ID, e, 50, 470, 590, 1)
-
-            self.translade(ap_obj[2].ID, hor, 300, 3560, 4320, 0)
-            self.translade(ap_obj[3].ID, hor, 300, 3560, 4320, 0)
-            self.translade(ap_obj[4].ID, hor, 120, 3840, 4040, 0)
-            self.translade(ap_obj[5].ID, ver, -300, 340, 700, 1)
-            self.translade(ap_obj[6].ID, ver, -300, 340, 700, 1)
-            self.translade(ap_obj[9].ID, hor, -300, 5380, 5740, 0)
-
-            if rot and ap_obj[7].ang <= - math.pi / 2:
-                ap_obj[7].pos = [self.p0[0] + 4520, 220]
-                ap_obj[7].ang = -math.pi / 2
-                ap_obj[8].pos = [self.p0[0] + 5200, 220]
-                ap_obj[8].ang = math.pi / 2
-
-            elif not rot and ap_obj[7].ang >= 0:
-                ap_obj[7].pos = [self.p0[0] + 4420, 120]
-                ap_obj[7].ang = 0
-                ap_obj[8].pos = [self.p0[0] + 5300, 120]
-                ap_obj[8].ang = 0
+            hor = self.get_button(level['hor'], 5, t1)
+            ver = self.get_button(level['ver'], 3, t1)
+            rot = self.get_button(level['rot'], 7, t1)
+            wall = self.get_button(level['wall'], 0, 0)
+
+            for [handle, ang_vel] in level['spinners']:
+                get(handle).ang_vel = ang_vel
+
+            enemies = [any(get(handle) for handle in group) for group in level['enemies']]
+
+            level['elevator'].update(enemies[0])
+            for mover in level['hor movers']:
+                mover.update(hor)
+            for mover in level['ver movers']:
+                mover.update(ver)
+
+            [[handle7, first7], [handle8, first8]] = level['rotors']
+            ap7 = get(handle7)
+            ap8 = get(handle8)
+            if rot and ap7.ang <= - math.pi / 2:
+                ap7.pos = [4520, 220]
+                ap7.ang = -math.pi / 2
+                ap8.pos = [5200, 220]
+                ap8.ang = math.pi / 2
+
+            elif not rot and ap7.ang >= 0:
+                ap7.pos = [4420, 120]
+                ap7.ang = 0
+                ap8.pos = [5300, 120]
+                ap8.ang = 0
             else:
                 s = -1 if rot else 1
-                circulate(ap_obj[7], -1, [self.p0[0] + 4420, self.p0[1] + 220], s * math.pi / 2, True)
-                circulate(ap_obj[8], -1, [self.p0[0] + 5300, self.p0[1] + 220], -s * math.pi / 2, True)
-
-
-            act1 = [False, False]
-            act2 = [True, False]
-            act3 = [False, False]
-            act4 = [True, False]
-            act =[act1, act2, act3, act4]
-
-            if funcs.check_once(self.player.pos[0] > self.p0[0] + 6520, 'act1'):
-                act[0][1] = True
-                act[0][0] = not act[0][0]
-            if funcs.check_once(self.player.pos[0] > self.p0[0] + 6800 and not e5, 'act2'):
-                act[1][1] = True
-                act[0][0] = not act[0][0]
-                act[1][0] = not act[1][0]
-            if funcs.check_once(self.player.pos[0] > self.p0[0] + 7080 and not (e6 or e7), 'act3'):
-                act[2][1] = True
-                act[0][0] = not act[0][0]
-                act[1][0] = not act[1][0]
-                act[2][0] = not act[2][0]
-            if funcs.check_once(self.player.pos[0] > self.p0[0] + 7360 and not (e8 or e9 or e10), 'act4'):
-                act[3][1] = True
-                act[0][0] = not act[0][0]
-                act[1][0] = not act[1][0]
-                act[2][0] = not act[2][0]
-                act[3][0] = not act[3][0]
-
-            self.translade(ap_obj[10].ID, act[0][0], 200, -60, 240, 1)
-            self.translade(ap_obj[11].ID, act[0][0], 200, 580, 880, 1)
-            self.translade(ap_obj[12].ID, act[1][0], 200, -60, 240, 1)
-            self.translade(ap_obj[13].ID, act[1][0], 200, 580, 880, 1)
-            self.translade(ap_obj[14].ID, act[2][0], 200, -60, 240, 1)
-            self.translade(ap_obj[15].ID, act[2][0], 200, 580, 880, 1)
-            self.translade(ap_obj[16].ID, act[3][0], 200, -60, 240, 1)
-            self.translade(ap_obj[17].ID, act[3][0], 200, 580, 880, 1)
-
-            if self.player.pos[0] < self.p0[0] + 6760 and act[3][1]:
-                self.translade(at_obj.ID, False, 200, 180, 340, 1)
-
-            self.translade(ap_obj[18].ID, not wall, 800, 100, 240, 1)
-
-        def level_3():
-
-            ac_obj = [False]
-            for i in range(3):
-                ac_obj.append(self.find_obj('ac' + str(i + 1)))
+                circulate(ap7, first7, -1, [4420, 220], s * math.pi / 2, True)
+                circulate(ap8, first8, -1, [5300, 220], -s * math.pi / 2, True)
 
-            ap_obj = [False]
-            for i in range(3):
-                ap_obj.append(self.find_obj('ap' + str(i + 1)))
+            # cada gatilho inverte todas as portas até a sua
+            x = self.player.pos[0]
+            act = [False, True, False, True]
+            for i, [latch, limit] in enumerate(level['acts']):
+                if latch.update(x > limit and (i == 0 or not enemies[i])):
+                    for j in range(i + 1):
+                        act[j] = not act[j]
 
-            ap_obj[1].vel[1] = 3000 * math.cos(self.t * math.pi) * self.dt
-            ap_obj[1].ang_vel = 400 * math.pi / 180 * math.cos(2 * self.t) * self.dt
+            for i, [top, bottom] in enumerate(level['doors']):
+                top.update(act[i])
+                bottom.update(act[i])
 
-            ap_obj[2].vel[1] = 3000 * math.cos(self.t * math.pi + math.pi) * self.dt
-            ap_obj[2].ang_vel = 300 * math.pi / 180 * math.cos(3 * self.t) * self.dt
+            if x < 6760 and level['acts'][3][0].on:
+                level['gate'].update(False)
 
-            ap_obj[3].vel[1] = 3000 * math.cos(self.t * math.pi) * self.dt
-            ap_obj[3].ang_vel = 200 * math.pi / 180 * math.cos(4 * self.t) * self.dt
+            level['wall mover'].update(not wall)
 
-            ac_obj[1].ang_vel = -60 *  self.dt
-            ac_obj[2].ang_vel =  60 * self.dt
-            ac_obj[3].ang_vel = -60 * self.dt
+        def level_3():
+            level = self.level
+            get = self.resolve_moving
 
-            if self.got_hit('main', 'mp1') and funcs.wait(0.3, self.t, 'platform fall 1'):
-                self.del_dist_joint(['mp1', [-80, -5], 'ic1', [0, 0], 215, ''])
-                if funcs.wait(0.8, self.t, 'platform fall 1.5'):
-                    self.del_dist_joint(['mp1', [80, -5], 'ic1', [0, 0], 230, ''])
+            for [handle, phase, ang_vel, freq] in level['platforms']:
+                ap = get(handle)
+                ap.vel[1] = 3000 * math.cos(self.t * math.pi + phase) / self.fps
+                ap.ang_vel = ang_vel * math.pi / 180 * math.cos(freq * self.t) / self.fps
 
-            if self.got_hit('main', 'mp2') and funcs.wait(0.3, self.t, 'platform fall 2'):
-                self.del_dist_joint(['mp2', [-80, -5], 'ic2', [0, 0], 215, ''])
-                if funcs.wait(0.7, self.t, 'platform fall 2.5'):
-                    self.del_dist_joint(['mp2', [80, -5], 'ic2', [0, 0], 230, ''])
+            for [handle, ang_vel] in level['spinners']:
+                get(handle).ang_vel = ang_vel / self.fps
 
-            if self.got_hit('main', 'mp3') and funcs.wait(0.2, self.t, 'platform fall 3'):
-                self.del_dist_joint(['mp3', [80, -5], 'ic3', [0, 0], 230, ''])
-                if funcs.wait(0.9, self.t, 'platform fall 3.5'):
-                    self.del_dist_joint(['mp3', [-80, -5], 'ic3', [0, 0], 215, ''])
+            for i, [latch, handle, ic, t1, p1, d1, t2, p2, d2] in enumerate(level['falls']):
+                mp = get(handle)
+                name = 'mp' + str(i + 1)
+                if latch.update(mp and self.player in mp.hits) and self.timers.wait(t1, self.t, None, 'platform fall ' + str(i + 1)):
+                    self.del_dist_joint([name, p1, ic, [0, 0], d1, ''])
+                    if self.timers.wait(t2, self.t, None, 'platform fall ' + str(i + 1) + '.5'):
+                        self.del_dist_joint([name, p2, ic, [0, 0], d2, ''])
 
 
-            if self.player.pos[0] > self.p0[0] + 8010:
+            if self.player.pos[0] > 8010:
                 self.GameOver = True
                 self.GameWin = True
 
         def level_4():
+            level = self.level
+            get = self.resolve_moving
 
-            ap_obj = [False]
-            for i in range(3):
-                ap_obj.append(self.find_obj('ap' + str(i + 1)))
-
+            ap_obj = [False] + [get(handle) for handle in level['ap'][1:]]
+            [act40, act41, act42] = level['acts']
 
-            a1 = self.player.pos[0] > self.p0[0] + 2120
-            if funcs.check_once(a1, 'act40'):
-                if self.soundeffects_setting and funcs.one_up('act40'):
+            a1 = self.player.pos[0] > 2120
+            if act40.update(a1):
+                if self.soundeffects_setting and self.blackboard.once('level', 'act40'):
                     self.wood_crack_sound.play()
-                b = self.find_obj('bridge1 end')
+                b = get(level['bridge end'])
                 if ap_obj[2].ang < 5 * math.pi / 180:
                     ap_obj[2].ang += 0.4 * math.pi / 180
-                if ap_obj[2].pos[1] < self.p0[1] + 540:
+                if ap_obj[2].pos[1] < 540:
                     ap_obj[2].pos[1] += 4
                     b.pos[1] += 5
-                if ap_obj[2].pos[0] > self.p0[0] + 2370:
+                if ap_obj[2].pos[0] > 2370:
                     ap_obj[2].pos[0] += -2
                     b.pos[0] += -6
 
-            a2 = self.player.pos[0] > self.p0[0] + 2580
-            a3 = self.player.pos[1] > self.p0[1] + 370
-            if funcs.check_once(a2 and a3, 'act41'):
-                if self.soundeffects_setting and funcs.one_up('act41'):
+            a2 = self.player.pos[0] > 2580
+            a3 = self.player.pos[1] > 370
+            if act41.update(a2 and a3):
+                if self.soundeffects_setting and self.blackboard.once('level', 'act41'):
                     self.wood_crack_sound.play()
-                if funcs.wait(0.1, self.t, 'act41 time'):
+                if self.timers.wait(0.1, self.t, None, 'act41 time'):
                     if ap_obj[1].ang > -4 * math.pi / 180:
                         ap_obj[1].ang += -0.4 * math.pi / 180
-                    if ap_obj[1].pos[1] < self.p0[1] + 610:
+                    if ap_obj[1].pos[1] < 610:
                         ap_obj[1].pos[1] += 4
-                    if ap_obj[1].pos[0] > self.p0[0] + 2786:
+                    if ap_obj[1].pos[0] > 2786:
                         ap_obj[1].pos[0] += -2
 
-            ip_obj = [False]
-            for i in range(10):
-                ip_obj.append(self.find_obj('ip' + str(i + 1)))
-
-            ic_obj = [False]
-            for i in range(2):
-                ic_obj.append(self.find_obj('ic' + str(i + 1)))
+            ip_obj = [False] + [get(handle) for handle in level['ip'][1:]]
 
-            ic_obj[1].ang_vel = -4000 * self.dt / 180
-            ic_obj[2].ang_vel = -4000 * self.dt / 180
+            for handle in level['ic']:
+                get(handle).ang_vel = -4000 / self.fps / 180
 
             for i in range(1, 5):
                 if ip_obj[i].pos[1] > -50:
-                    ip_obj[i].vel[1] = -4000 * self.dt
+                    ip_obj[i].vel[1] = -4000 / self.fps
                 else:
                     ip_obj[i].pos[1] = 770
 
             for i in range(5, 9):
                 if ip_obj[i].pos[1] < 770:
-                    ip_obj[i].vel[1] = 4000 * self.dt
+                    ip_obj[i].vel[1] = 4000 / self.fps
                 else:
                     ip_obj[i].pos[1] = -50
 
             ps = 60
 
             if ip_obj[9].pos[1] > 360 - ps:
-                ip_obj[9].vel[1] = -4000 * self.dt
+                ip_obj[9].vel[1] = -4000 / self.fps
             else:
                 ip_obj[9].pos[1] = 360
 
             if ip_obj[10].pos[1] < 360 + ps:
-                ip_obj[10].vel[1] = 4000 * self.dt
+                ip_obj[10].vel[1] = 4000 / self.fps
             else:
                 ip_obj[10].pos[1] = 360
 
-            a4 = self.player.pos[0] > self.p0[0] + 5640
-            a5 = self.player.pos[1] > self.p0[1] + 360
+            a4 = self.player.pos[0] > 5640
+            a5 = self.player.pos[1] > 360
 
-            if funcs.check_once(a4 and a5, 'act42'):
-                if self.soundeffects_setting and funcs.one_up('act42'):
+            if act42.update(a4 and a5):
+                if self.soundeffects_setting and self.blackboard.once('level', 'act42'):
                     self.wood_crack_sound.play()
-                if funcs.wait(0.1, self.t, 'act42 time'):
+                if self.timers.wait(0.1, self.t, None, 'act42 time'):
                     if ap_obj[3].ang < 2 * math.pi / 180:
                         ap_obj[3].ang += 0.4 * math.pi / 180
-                    if ap_obj[3].pos[1] < self.p0[1] + 600:
+                    if ap_obj[3].pos[1] < 600:
                         ap_obj[3].pos[1] += 4
-                    if ap_obj[3].pos[0] < self.p0[0] + 5950:
+                    if ap_obj[3].pos[0] < 5950:
                         ap_obj[3].pos[0] += 2
 
             self.launch_ball(6276, 327, 800, 180, 70)
@@ -2290,8 +2757,8 @@ class Simulation():
         name = 'cannon' + str(x + y)
         s = 1 if ang > 90 and ang < 270 else -1
 
-        if funcs.one_up(name):
-            self.add_circle(self.p0[0] + x, self.p0[1] + y, 20, (ang - s * 20) * math.pi / 180, True, False, name)
+        if self.blackboard.once('level', name):
+            self.add_circle(x, y, 20, (ang - s * 20) * math.pi / 180, True, False, name)
             cannon = self.obj_list[-1]
             cannon.visible = False
             cannon.image = [self.graphics.load_img('game_files/images/comum/cannon.png'), 1.1]
@@ -2300,8 +2767,8 @@ class Simulation():
             cannon.ang += s * 20 * math.pi / 180 / freq
 
         if funcs.interval(self.frames, freq, offset):
-            self.add_circle(self.p0[0] + x, self.p0[1] + y, 20, 0, False, False, 'bullet_ball', 5)
-            circle = self.obj_list[-1]
+            # categoria BULLET: a bola de canhão não faz sombra
+            circle = self.spawn_circle('bullet_ball', x, y, 20, 0, False, False, 5, broadphase.BULLET)
             dir = funcs.get_dir(ang)
             circle.vel[0] = v * dir[0]
             circle.vel[1] = v * dir[1]
@@ -2311,113 +2778,147 @@ class Simulation():
             circle.image = [self.graphics.load_img('game_files/images/comum/redball.png'), 1]
             cannon.ang = (ang - s * 20) * math.pi / 180
 
+    def update_physics(self):
+        # passo fixo: a física roda zero ou mais vezes por frame
+        self.accumulator += self.frame_dt
+        while self.accumulator >= self.step_dt:
+            self.store.save(self.store.rows(self.obj_list))
+            for obj in self.obj_list:
+                if not obj.sleeping:
+                    obj.update_all()
+            self.update_collisions()
+            self.update_joints()
+            self.update_islands()
+            self.update_solver()
+            self.update_dynamics()
+            self.accumulator -= self.step_dt
+        self.alpha = self.accumulator / self.step_dt
+
+        for joint in self.joints:
+            if type(joint) is DistanceJoint:
+                pA = joint.pA
+                pB = joint.pB
+                if joint.sprite == '':
+                    self.draw_line.append([funcs.colors('white'), pA, pB, 1])
+                else:
+                    img = self.graphics.load_img('game_files/images/comum/cordas/' + joint.sprite + '.png')
+                    ang = -math.atan2(pB[1] - pA[1],pB[0] - pA[0]) - math.pi/2
+                    self.special_sprites.append([img, pB, ang, joint.max_dist])
+
     def update_joints(self):
 
+        self.joints = []
+        k = self.step_dt * self.fps
+
         for i in range(len(self.rev_joint_list)):
             rev = self.rev_joint_list[ - i - 1]
-            objA = self.find_obj(rev[0])
-            rpA = rev[1]
-            objB = self.find_obj(rev[2])
-            rpB = rev[3]
+            objA, objB = self.joint_bodies(rev, 5, 6)
             K = rev[4]
 
             if objA and objB:
 
-                angA = -objA.ang
-                angB = -objB.ang
-
-                rA = [rpA[0] * math.cos(angA) - rpA[1] * math.sin(angA), rpA[1] * math.cos(angA) + rpA[0] * math.sin(angA)]
-                rB = [rpB[0] * math.cos(angB) - rpB[1] * math.sin(angB), rpB[1] * math.cos(angB) + rpB[0] * math.sin(angB)]
-
-                pA = [objA.pos[0] + rA[0], objA.pos[1] + rA[1]]
-                pB = [objB.pos[0] + rB[0], objB.pos[1] + rB[1]]
-
-                dist = funcs.dpp(pA, pB)
-                dn = [pA[0] - pB[0], pA[1] - pB[1]]
-                d = funcs.dpp(dn)
-                n = funcs.norm(dn)
-                s = 0.1
-                total_sum = objA.inv_mass + objB.inv_mass + objA.inv_inertia * funcs.cross(rA, n) ** 2 + objB.inv_inertia * funcs.cross(rB, n) ** 2
-                if total_sum != 0:
-
-                    impulse = [n[0] * dist / (total_sum * s), n[1] * dist / (total_sum * s)]
-                    neg_impulse = [- impulse[0], - impulse[1]]
+                joint = RevoluteJoint(objA, rev[1], objB, rev[3])
+                if joint.det != 0:
+                    self.joints.append(joint)
                     if not objB.static:
-                        objB.apply_impulse(impulse, rB)
-                        objB.pos[0] = objA.pos[0] + rA[0] - rB[0]
-                        objB.pos[1] = objA.pos[1] + rA[1] - rB[1]
-                        objB.ang_vel -= objB.ang * K
+                        objB.ang_vel -= objB.ang * K * k
                     if not objA.static:
-                        objA.apply_impulse(neg_impulse, rA)
-                        objA.pos[0] = objB.pos[0] + rB[0] - rA[0]
-                        objA.pos[1] = objB.pos[1] + rB[1] - rA[1]
-                        objA.ang_vel -= objA.ang * K
+                        objA.ang_vel -= objA.ang * K * k
 
-                    self.update_drag(objB, 0.99)
-                    self.update_drag(objA, 0.99)
-
-                    # self.draw_circle.append([funcs.colors('white'), [int(pA[0]), int(pA[1])], 3, 0])
-                    # self.draw_circle.append([funcs.colors('red'), [int(pB[0]), int(pB[1])], 3, 0])
+                    self.update_drag(objB, 0.99 ** k)
+                    self.update_drag(objA, 0.99 ** k)
 
         for dist in self.dist_joint_list:
-            objA = self.find_obj(dist[0])
-            rpA = dist[1]
-            objB = self.find_obj(dist[2])
-            rpB = dist[3]
+            objA, objB = self.joint_bodies(dist, 6, 7)
             max_dist = dist[4]
             sprite = dist[5]
 
             if objA and objB:
 
-                angA = -objA.ang
-                angB = -objB.ang
-
-                rA = [rpA[0] * math.cos(angA) - rpA[1] * math.sin(angA), rpA[1] * math.cos(angA) + rpA[0] * math.sin(angA)]
-                rB = [rpB[0] * math.cos(angB) - rpB[1] * math.sin(angB), rpB[1] * math.cos(angB) + rpB[0] * math.sin(angB)]
-
-                pA = [objA.pos[0] + rA[0], objA.pos[1] + rA[1]]
-                pB = [objB.pos[0] + rB[0], objB.pos[1] + rB[1]]
+                joint = DistanceJoint(objA, dist[1], objB, dist[3], max_dist, sprite)
+                self.joints.append(joint)
 
-                dn = [pA[0] - pB[0], pA[1] - pB[1]]
-                d = funcs.dpp(dn)
-                n = funcs.norm(dn)
-                s = 0.1
-                difference = (d - max_dist)
-                total_sum = objA.inv_mass + objB.inv_mass + objA.inv_inertia * funcs.cross(rA, n) ** 2 + objB.inv_inertia * funcs.cross(rB, n) ** 2
-                impulse = [n[0] * difference / (total_sum * s), n[1] * difference / (total_sum * s)]
-                neg_impulse = [- impulse[0], - impulse[1]]
+                self.update_drag(objB, 0.95 ** k)
+                self.update_drag(objA, 0.95 ** k)
 
-                if difference > 0:
-                    objB.apply_impulse(impulse, rB)
-                    objA.apply_impulse(neg_impulse, rA)
+    def update_islands(self):
+        # ilhas: corpos ligados por contatos e juntas. estáticos não ligam ilhas
+        parent = {}
 
-                self.update_drag(objB, 0.95)
-                self.update_drag(objA, 0.95)
-
-                if sprite == '':
-                    self.draw_line.append([funcs.colors('white'), pA, pB, 1])
-                else:
-                    img = self.graphics.load_img('game_files/images/comum/cordas/' + sprite + '.png')
-                    pos = [(pA[0] + pB[0])/2, (pA[1] + pB[1])/2]
-                    ang = -math.atan2(pB[1] - pA[1],pB[0] - pA[0]) - math.pi/2
-                    self.special_sprites.append([img, pB, ang, max_dist])
-
-    def update_dynamics(self):
+        def root(obj):
+            while parent[obj] is not obj:
+                parent[obj] = parent[parent[obj]]
+                obj = parent[obj]
+            return obj
 
         for obj in self.obj_list:
-            if obj.allow_gravity and not obj.static:
-                obj.vel[0] += (obj.force[0] * obj.inv_mass + self.gravity[0]) * self.dt
-                obj.vel[1] += (obj.force[1] * obj.inv_mass + self.gravity[1]) * self.dt
+            parent[obj] = obj
+            if obj.sleeping and (not obj.can_sleep() or obj.disturbed()):
+                obj.wake()
+
+        for c in list(self.contacts.values()) + self.joints:
+            A = c.A
+            B = c.B
+            if A not in parent or B not in parent:
+                continue
+            if A.static or B.static:
+                # plataformas em movimento acordam quem está em cima
+                S, D = (A, B) if A.static else (B, A)
+                if D.sleeping and (S.vel[0] or S.vel[1] or S.ang_vel):
+                    D.wake()
+                continue
+            parent[root(A)] = root(B)
+
+        islands = {}
+        for obj in self.obj_list:
+            if not obj.static:
+                islands.setdefault(root(obj), []).append(obj)
+
+        for island in islands.values():
+            awake = [obj for obj in island if not obj.sleeping]
+            if not awake:
+                continue
+            if all(obj.can_sleep() and obj.sleep_time >= self.sleep_delay for obj in island):
+                for obj in island:
+                    obj.sleep()
             else:
-                obj.vel[0] += obj.force[0] * obj.inv_mass * self.dt
-                obj.vel[1] += obj.force[1] * obj.inv_mass * self.dt
-            obj.ang_vel += obj.torque * obj.inv_inertia
+                for obj in island:
+                    if obj.sleeping:
+                        obj.wake()
+
+    def update_solver(self):
+        constraints = [c for c in list(self.contacts.values()) + self.joints if not (c.A.sleeping or c.B.sleeping)]
+        solving = set()
+        for c in constraints:
+            solving.add(c.A)
+            solving.add(c.B)
+        for obj in solving:
+            obj.begin_solve()
+
+        for c in constraints:
+            if type(c) is Contact:
+                c.warm_start()
+
+        for i in range(self.velocity_iterations):
+            for c in constraints:
+                c.solve()
+
+        for i in range(self.position_iterations):
+            for c in constraints:
+                c.correct()
+
+        for obj in solving:
+            obj.end_solve()
 
-            self.update_drag(obj, 0.99)
+        for obj in self.obj_list:
+            if not obj.sleeping and funcs.pol(obj.vel[0], obj.vel[1]) < self.sleep_linear and abs(obj.ang_vel) < self.sleep_angular:
+                obj.sleep_time += self.step_dt
+            else:
+                obj.sleep_time = 0
 
-            obj.pos[0] += obj.vel[0] * self.dt
-            obj.pos[1] += obj.vel[1] * self.dt
-            obj.ang += obj.ang_vel * self.dt
+    def update_dynamics(self):
+        rows = self.store.rows(self.obj_list)
+        self.store.integrate(rows, self.gravity, self.step_dt, 0.99 ** (self.step_dt * self.fps))
 
     def update_lights(self):
 
@@ -2427,14 +2928,14 @@ class Simulation():
             shad = shadow.Shadow()
 
             p = light[0]
-            pos = [self.p0[0] + p[0], self.p0[1] + p[1]]
+            pos = [p[0], p[1]]
             radius = light[3]
             t = light[4]
 
             if self.player.pos[0] > (pos[0] - radius) and self.player.pos[0] < (pos[0] + radius):
-                f = funcs.step_response(1, t, self.t, 'light ' + str(pos[0]))
+                f = self.tweens.response(1, t, self.t, None, ('light', pos[0]))
             else:
-                f = funcs.step_response(0, t, self.t, 'light ' + str(pos[0]))
+                f = self.tweens.response(0, t, self.t, None, ('light', pos[0]))
             if f > 0:
                 objects = light[5]
                 if objects:
@@ -2447,11 +2948,12 @@ class Simulation():
                 occluders = []
 
                 for obj in obj_list:
-                    if self.in_scene(obj, radius) and not obj.figure and not obj.name.startswith("bullet") and not obj.name.startswith("blood"):
+                    if self.in_scene(obj, radius) and not obj.figure and not obj.category & (broadphase.BLOOD | broadphase.BULLET):
                         if obj.type == 'circle':
                             obj.set_light_segments(pos)
                         limit = 1
-                        if obj.box[0] < self.screen_w * limit and obj.box[1] > self.screen_w * (1 - limit):
+                        x = self.camera.pos[0]
+                        if obj.box[0] < x + self.screen_w * limit and obj.box[1] > x + self.screen_w * (1 - limit):
                             occluders.append(occluder.Occluder(obj.light_segments))
 
                 alpha = light[2] * f
@@ -2479,10 +2981,10 @@ class Simulation():
             for obj in self.obj_list:
                 if obj.is_player and not obj.stop and abs(obj.pos[1] - gun.pos[1]) < 90 and abs(obj.pos[0] - gun.pos[0]) < 50:
 
-                    if not obj.has_weapon:
-                        obj.using_weapon = True
-                    obj.has_weapon = True
-                    obj.ammo += gun.ammo
+                    if not obj.weapon.has_weapon:
+                        obj.weapon.using_weapon = True
+                    obj.weapon.has_weapon = True
+                    obj.weapon.ammo += gun.weapon.ammo
                     if len(self.guns_list) > 0:
                         self.destroy_obj(self.guns_list[i].ID)
                     del self.guns_list[i]
@@ -2495,68 +2997,83 @@ class Simulation():
             i += 1
 
     def update_bullets(self):
+        # cada bala é um segmento lançado contra o mundo no trecho que anda no frame
         radius = 40
-        player = False
         i = 0
         while i < len(self.bullet_list):
             bullet = self.bullet_list[i]
-            delete = False
-            for target in bullet.hits:
-                if not target.figure:
-                    if len(bullet.hits) > 0 and target.ID != bullet.master and target.ID != bullet.master + 1:
-                        delete = True
-                        if target.is_player:
-                            target.life -= 0.1
-                            player = True
-                            if self.soundeffects_setting:
-                                self.shoot_player_hit_sound.play()
-                        elif target.name == 'head':
-                            player = True
-                            self.find_obj(target.ID - 1).life -= 0.2
-                            if self.soundeffects_setting:
-                                self.shoot_player_hit_sound.play()
-                        elif target.is_voronoi:
-                            if self.soundeffects_setting:
-                                r = random.randrange(0, 3)
-                                self.shoot_glass_hit_sound[r].play()
-                            self.destroy_obj(target.is_voronoi)
-                            for vor in self.voronoi:
-                                if vor[0] == target.is_voronoi:
-                                    for obj in vor[1]:
-                                        dist = funcs.dpp(bullet.pos, obj.pos)
-                                        obj.figure = False
-                                        obj.collider = True
-                                        if dist < radius:
-                                            obj.static = False
-                                            obj.allow_gravity = True
-                                            obj.vel[0] = -(bullet.pos[0] - obj.pos[0])
-                                            obj.vel[1] = -(bullet.pos[1] - obj.pos[1])
-                                            obj.max_life_time = obj.life_time + 1
-                        else:
-                            if self.soundeffects_setting:
-                                r = random.randrange(0,3)
-                                self.shoot_wall_hit_sound[r].play()
-            if delete:
-                if player:
-                    for j in range(7):
-                        dx = random.randrange(-20, 20)
-                        dy = random.randrange(-20, 20)
-                        size = random.randrange(1, 5)
-                        [x, y] = [bullet.pos[0] + dx, bullet.pos[1] + dy]
-                        self.add_circle(x, y, size, 0, False, True, 'blood')
-                        circle = self.obj_list[-1]
-                        circle.max_life_time = abs(dx / 10)
-                        circle.vel[0] = dx * 5
-                        circle.vel[1] = dy * 5
-                        circle.color = funcs.colors('red')
-                        circle.visible = True
-                        circle.thickness = 0
-                        circle.exclude_list.append(target.ID)
-                self.hits_sprites.append([self.hit_image, bullet.pos])
-                self.destroy_obj(bullet.ID)
-                del self.bullet_list[i]
+            bullet.life_time += self.dt
+            p1 = bullet.pos
+            p2 = [p1[0] + bullet.vel[0] * self.dt, p1[1] + bullet.vel[1] * self.dt]
+            hit = self.ray_cast(p1, p2, bullet)
+
+            if not hit:
+                bullet.pos = p2
+                if bullet.life_time > bullet.max_life_time:
+                    if bullet.pool:
+                        bullet.pool.release(bullet)
+                    del self.bullet_list[i]
+                else:
+                    i += 1
+                continue
+
+            [t, target, point, normal] = hit
+            bullet.pos = point
+            player = False
+            j = [bullet.vel[0] * bullet.mass, bullet.vel[1] * bullet.mass]
+            target.apply_impulse(j, [point[0] - target.pos[0], point[1] - target.pos[1]])
+
+            if target.is_player:
+                target.life -= 0.1
+                player = True
+                if self.soundeffects_setting:
+                    self.shoot_player_hit_sound.play()
+            elif target.name == 'head':
+                player = True
+                self.find_obj(target.ID - 1).life -= 0.2
+                if self.soundeffects_setting:
+                    self.shoot_player_hit_sound.play()
+            elif target.is_voronoi:
+                if self.soundeffects_setting:
+                    r = random.randrange(0, 3)
+                    self.shoot_glass_hit_sound[r].play()
+                self.destroy_obj(target.is_voronoi)
+                for vor in self.voronoi:
+                    if vor[0] == target.is_voronoi:
+                        for obj in vor[1]:
+                            dist = funcs.dpp(bullet.pos, obj.pos)
+                            obj.figure = False
+                            obj.collider = True
+                            if dist < radius:
+                                obj.static = False
+                                obj.allow_gravity = True
+                                self.broadphase.touch(obj)
+                                obj.vel[0] = -(bullet.pos[0] - obj.pos[0])
+                                obj.vel[1] = -(bullet.pos[1] - obj.pos[1])
+                                obj.max_life_time = obj.life_time + 1
             else:
-                i += 1
+                if self.soundeffects_setting:
+                    r = random.randrange(0,3)
+                    self.shoot_wall_hit_sound[r].play()
+
+            if player:
+                for k in range(7):
+                    dx = random.randrange(-20, 20)
+                    dy = random.randrange(-20, 20)
+                    size = random.randrange(1, 5)
+                    [x, y] = [bullet.pos[0] + dx, bullet.pos[1] + dy]
+                    circle = self.spawn_circle('blood', x, y, size, category=broadphase.BLOOD)
+                    circle.max_life_time = abs(dx / 10)
+                    circle.vel[0] = dx * 5
+                    circle.vel[1] = dy * 5
+                    circle.color = funcs.colors('red')
+                    circle.visible = True
+                    circle.thickness = 0
+                    circle.joined.add(target.ID)
+            self.hits_sprites.append([self.hit_image, bullet.pos])
+            if bullet.pool:
+                bullet.pool.release(bullet)
+            del self.bullet_list[i]
 
     def update_players(self):
 
@@ -2566,26 +3083,26 @@ class Simulation():
             foot2.ang = player.ang
             step = 40 # maxima distância entre os pés
             if player.in_ground and not player.stop:
-                p = funcs.step_response(0, 0.2, self.t, 'foot jump ' + str(player.ID))
+                p = self.tweens.response(0, 0.2, self.t, player.ID, 'foot jump')
                 if abs(player.vel[0] - player.ground.vel[0]) > 0.5:
-                    player.foot_accumulator += (player.vel[0] - player.ground.vel[0]) * self.dt if player.in_ground else player.vel[0] * self.dt
-                    f = funcs.step_response(1, 0.2, self.t, 'foot ' + str(player.ID))
+                    player.anim.foot_accumulator += (player.vel[0] - player.ground.vel[0]) * self.dt if player.in_ground else player.vel[0] * self.dt
+                    f = self.tweens.response(1, 0.2, self.t, player.ID, 'foot')
                 else:
-                    f = funcs.step_response(0, 0.2, self.t, 'foot ' + str(player.ID))
+                    f = self.tweens.response(0, 0.2, self.t, player.ID, 'foot')
                 foot1.pos[1] = 0
-                foot2.pos[1] = - step / 5 * math.sin(player.foot_accumulator % step * math.pi / step) * f
-                foot1.pos[0] = - player.foot_accumulator % step - step / 2
-                foot2.pos[0] = + player.foot_accumulator % step - step / 2
+                foot2.pos[1] = - step / 5 * math.sin(player.anim.foot_accumulator % step * math.pi / step) * f
+                foot1.pos[0] = - player.anim.foot_accumulator % step - step / 2
+                foot2.pos[0] = + player.anim.foot_accumulator % step - step / 2
                 foot1.ang += 20 * math.pi / 180 * p * funcs.signal(-player.vel[0])
                 foot2.ang += 20 * math.pi / 180 * p * funcs.signal(-player.vel[0])
             else:
-                p = funcs.step_response(1, 0.8, self.t, 'foot jump ' + str(player.ID))
-                f = funcs.step_response(0, 0.2, self.t, 'foot ' + str(player.ID))
+                p = self.tweens.response(1, 0.8, self.t, player.ID, 'foot jump')
+                f = self.tweens.response(0, 0.2, self.t, player.ID, 'foot')
 
-            x1 = - player.foot_accumulator % step - step / 2
+            x1 = - player.anim.foot_accumulator % step - step / 2
             y1 = 0
-            x2 = + player.foot_accumulator % step - step / 2
-            y2 = - step / 5 * math.sin(player.foot_accumulator % step * math.pi / step) * f
+            x2 = + player.anim.foot_accumulator % step - step / 2
+            y2 = - step / 5 * math.sin(player.anim.foot_accumulator % step * math.pi / step) * f
             ang = - player.ang
             foot1.pos[1] = y1 * math.cos(ang) + x1 * math.sin(ang)
             foot2.pos[1] = y2 * math.cos(ang) + x2 * math.sin(ang)
@@ -2604,23 +3121,23 @@ class Simulation():
             dist = 20
 
             if left:
-                pL = funcs.step_response(0, t2, self.t, 'shoot Lhand ' + str(player.ID))
-                pR = funcs.step_response(1, t2, self.t, 'shoot Rhand ' + str(player.ID))
+                pL = self.tweens.response(0, t2, self.t, player.ID, 'shoot Lhand')
+                pR = self.tweens.response(1, t2, self.t, player.ID, 'shoot Rhand')
 
                 rarm.pos = [dist * dir[0], (dist * dir[1] + 3 * math.cos(self.t * math.pi)) * pR]
                 rarm.ang = ang * pR
                 larm.pos = [0, dist * dir[1] * pL + 3 * math.sin(self.t * math.pi) * pR]
                 larm.ang = ang * pL - math.pi / 2 * pR
             else:
-                pL = funcs.step_response(1, t2, self.t, 'shoot Lhand ' + str(player.ID))
-                pR = funcs.step_response(0, t2, self.t, 'shoot Rhand ' + str(player.ID))
+                pL = self.tweens.response(1, t2, self.t, player.ID, 'shoot Lhand')
+                pR = self.tweens.response(0, t2, self.t, player.ID, 'shoot Rhand')
 
                 larm.pos = [dist * dir[0], (dist * dir[1] + 3 * math.sin(self.t * math.pi)) * pL]
                 larm.ang = ang * pL
                 rarm.pos = [0, dist * dir[1] * pR + 3 * math.cos(self.t * math.pi) * pL]
                 rarm.ang = ang * pR + math.pi / 2 * pL
 
-            if funcs.delay(player.shooting, reload, self.t, 'bullet' + str(player.ID), False) and not player.stop:
+            if self.timers.delay(player.shooting, reload, self.t, player.ID, 'bullet', False) and not player.stop:
                 dt = 20
                 arm = rarm if left else larm
                 r = random.randrange(1500, 3000)
@@ -2629,13 +3146,12 @@ class Simulation():
                     self.shoot_sound[0].play()
                 speed = r if is_main else r / 2
                 vel = [speed * dir[0], speed * dir[1]]
-                l = funcs.dpp(vel) * self.dt * 0.8
-                self.add_circle(arm.pos[0] + arm.follows[1][0] + player.pos[0] + dir[0] * 20, arm.pos[1] + arm.follows[1][1] + player.pos[1] + dir[1] * 20 - 10, 2, ang, False, True, 'bullet', 10)
+                pos = [arm.pos[0] + arm.offset[0] + player.pos[0] + dir[0] * 20, arm.pos[1] + arm.offset[1] + player.pos[1] + dir[1] * 20 - 10]
                 if not is_main or not self.godmode_setting:
-                    player.ammo -= 1
-                if player.ammo == 0 and not self.godmode_setting:
-                    player.using_weapon = False
-                    player.has_weapon = False
+                    player.weapon.ammo -= 1
+                if player.weapon.ammo == 0 and not self.godmode_setting:
+                    player.weapon.using_weapon = False
+                    player.weapon.has_weapon = False
                     if self.soundeffects_setting:
                         self.noammo_sound.play()
 
@@ -2643,19 +3159,8 @@ class Simulation():
                     rarm.ang += 20 * math.pi / 180
                 else:
                     larm.ang -= 20 * math.pi / 180
-                bullet = self.obj_list[-1]
-                bullet.vel = vel
-                for i in range(5):
-                    bullet.exclude_list.append(head.ID + i)
-                bullet.allow_gravity = False
-                bullet.allow_rotation = False
-                bullet.eu = bullet.du = 0
-                bullet.e = 1
-                bullet.master = player.ID
-                bullet.visible = True
-                bullet.thickness = 0
-                bullet.color = funcs.colors('yellow')
-                bullet.max_life_time = 2
+                bullet = self.pools['bullet'].acquire()
+                bullet.reset(pos, vel, player.ID, player.group)
                 self.bullet_list.append(bullet)
 
         def punch():
@@ -2668,7 +3173,7 @@ class Simulation():
                         rel = [xo - xp, yo - yp]
                         if funcs.dpp(player.pos, obj.pos) < 150 and funcs.dot(dir, rel) > 0 and not obj.static and not obj.figure:
                             f = 2 if is_main else 1
-                            magnitude = random.randrange(4000, 5000) / self.dt
+                            magnitude = random.randrange(4000, 5000) * self.fps
                             if self.soundeffects_setting:
                                 r = random.randrange(0, 2)
                                 self.punch_hit_sound[r].play()
@@ -2681,18 +3186,18 @@ class Simulation():
             rarm.ang = player.ang + ang
             if player.punching and not player.stop:
                 p = 1 if left else 0
-                s = 'l' if left else 'r'
-                pL = funcs.step_response(p, t1, self.t, 'punch Lhand ' + str(player.ID))
-                pR = funcs.step_response((1 - p), t1, self.t, 'punch Rhand ' + str(player.ID))
+                s = 'l punch' if left else 'r punch'
+                pL = self.tweens.response(p, t1, self.t, player.ID, 'punch Lhand')
+                pR = self.tweens.response((1 - p), t1, self.t, player.ID, 'punch Rhand')
                 larm.figure = False
-                if funcs.wait(t1, self.t, s + ' punch' + str(player.ID)):
+                if self.timers.wait(t1, self.t, player.ID, s):
                     punched(dir)
                     player.punching = False
                     larm.figure = True
             else:
-                pL = funcs.step_response(0, t2, self.t, 'punch Lhand ' + str(player.ID))
-                pR = funcs.step_response(0, t2, self.t, 'punch Rhand ' + str(player.ID))
-            if funcs.delay(player.punching, 0.5, self.t, 'punch bug', False):
+                pL = self.tweens.response(0, t2, self.t, player.ID, 'punch Lhand')
+                pR = self.tweens.response(0, t2, self.t, player.ID, 'punch Rhand')
+            if self.timers.delay(player.punching, 0.5, self.t, None, 'punch bug', False):
                 player.punching = False
             larm.pos[0] = 100 * dir[0] * pL
             larm.pos[1] = 100 * dir[1] * pL + 3 * math.sin(self.t * math.pi)
@@ -2717,18 +3222,18 @@ class Simulation():
             if not found:
                 player.grabbing = False
                 player.grabbed[0] = False
-                p = funcs.step_response(0, t2, self.t, 'grab L' + str(player.ID))
+                p = self.tweens.response(0, t2, self.t, player.ID, 'grab L')
                 R = 0
                 L = 0
             else:
                 if obj_left == 1:
-                    p = funcs.step_response(1, t2, self.t, 'grab L' + str(player.ID))
-                    funcs.step_response(0, t2, self.t, 'grab R' + str(player.ID))
+                    p = self.tweens.response(1, t2, self.t, player.ID, 'grab L')
+                    self.tweens.response(0, t2, self.t, player.ID, 'grab R')
                     R = 10
                     L = 40
                 elif obj_left == -1:
-                    p = funcs.step_response(-1, t2, self.t, 'grab R' + str(player.ID))
-                    funcs.step_response(0, t2, self.t, 'grab L' + str(player.ID))
+                    p = self.tweens.response(-1, t2, self.t, player.ID, 'grab R')
+                    self.tweens.response(0, t2, self.t, player.ID, 'grab L')
                     R = 40
                     L = 10
 
@@ -2754,28 +3259,28 @@ class Simulation():
         def sprites():
 
 
-            w = 1 if player.using_weapon else 0
+            w = 1 if player.weapon.using_weapon else 0
             l = 1 if left else 0
-            player.larm.image = player.lhand_sprite[w * (1 - l)]
-            player.rarm.image = player.rhand_sprite[w * l]
+            player.larm.image = player.anim.lhand_sprite[w * (1 - l)]
+            player.rarm.image = player.anim.rhand_sprite[w * l]
 
             g = 1 if self.godmode_setting else 0
 
             if is_main:
-                player.image = player.body_sprite[g]
-                player.head.image = player.head_sprite[g]
-                player.foot1.image = player.foot_sprite[g]
-                player.foot2.image = player.foot_sprite[g]
-                if funcs.changed(self.godmode_setting, 'godmode' + str(player.ID)) and not player.facing_left:
+                player.image = player.anim.body_sprite[g]
+                player.head.image = player.anim.head_sprite[g]
+                player.foot1.image = player.anim.foot_sprite[g]
+                player.foot2.image = player.anim.foot_sprite[g]
+                if self.blackboard.changed(self.godmode_setting, player.ID, 'godmode') and not player.facing_left:
                     player.change_direction(True)
-            if player.vel[0] !=0 and funcs.changed(player.vel[0] > 0, 'facing left' + str(player.ID)):
+            if player.vel[0] !=0 and self.blackboard.changed(player.vel[0] > 0, player.ID, 'facing left'):
                 player.change_direction()
 
         def set_random_stats():
             t = 3 if funcs.dpp(self.player.pos, player.pos) < 100 else 1
             if int(self.t * 60 + self.ID * 45) % (150 / t) == 0:
                 player.punching = True
-            if int(self.t * 60 + self.ID * 45) % player.weapon_rate == 0:
+            if int(self.t * 60 + self.ID * 45) % player.weapon.weapon_rate == 0:
                 player.shooting = True
             if int(self.t * 60 + self.ID * 10) % 30 == 0:
                 player.shooting = False
@@ -2783,7 +3288,7 @@ class Simulation():
         for obj in self.obj_list:
             if obj.is_player:
                 s = self.jump_sound if self.soundeffects_setting else False
-                obj.update(self.t, self.player.pos[0], s, self.godmode_setting)
+                obj.update(self.t, self.player.pos[0], s, self.godmode_setting, self.timers, self.tweens)
 
                 is_main = obj.name == 'main'
                 player = obj
@@ -2792,22 +3297,24 @@ class Simulation():
                 rarm = player.rarm
                 foot1 = player.foot1
                 foot2 = player.foot2
-                left = self.mouse_pos[0] >= player.pos[0] if is_main else player.vel[0] > 0
+                mouse = self.camera.to_world(self.mouse_pos)
+                left = mouse[0] >= player.pos[0] if is_main else player.vel[0] > 0
                 t1 = 0.05
                 t2 = 0.2
                 head.ang = player.ang
 
                 if is_main:
-                    dir = funcs.get_dir(player.pos, self.mouse_pos)
+                    dir = funcs.get_dir(player.pos, mouse)
                     ang = - math.atan2(dir[1], dir[0]) - math.pi / 2
                     if self.godmode_setting:
-                        player.has_weapon = True
+                        player.weapon.has_weapon = True
                 else:
                     conditions = self.player.pos[0] > player.pos[0] and player.vel[0] > 0 or self.player.pos[0] < player.pos[0] and player.vel[0] < 0
                     dir = funcs.get_dir(player.pos, self.player.pos) if conditions else [funcs.signal(player.vel[0]), 0]
                     ang = - math.atan2(dir[1], dir[0]) - math.pi / 2 if conditions else (-math.pi / 2 if player.vel[0] > 0 else math.pi / 2)
                     set_random_stats()
-                    if player.pos[0] < -30 or player.pos[0] > self.screen_w +30:
+                    x = player.pos[0] - self.camera.pos[0]
+                    if x < -30 or x > self.screen_w +30:
                         player.shooting = False
                         player.punching = False
                         player.static = True
@@ -2816,16 +3323,16 @@ class Simulation():
                     else:
                         player.static = False
                         player.allow_gravity = True
-                        if funcs.one_up('player first' + str(player.ID)):
+                        if self.blackboard.once(player.ID, 'player first'):
                             player.vel = [0, 0]
                 if player.grabbing:
                     grab()
                 elif abs(self.player.pos[0] - player.pos[0]) < 1000:
                     player.grabbed = [False, False]
-                    funcs.step_response(0, t2, self.t, 'grab L' + str(player.ID))
-                    funcs.step_response(0, t2, self.t, 'grab R' + str(player.ID))
+                    self.tweens.response(0, t2, self.t, player.ID, 'grab L')
+                    self.tweens.response(0, t2, self.t, player.ID, 'grab R')
 
-                    if player.using_weapon:
+                    if player.weapon.using_weapon:
                         shoot()
                     else:
                         punch()
@@ -2837,31 +3344,57 @@ class Simulation():
                     face()
 
     def update_followers(self):
-        for obj in self.obj_list:
-            if obj.follows:
-                t = False
-                for obj1 in self.obj_list:
-                    if obj.follows[0] == obj1.name:
-                        fobj = obj1
-                        rel_pos = obj.follows[1]
-                        t = True
-                if t:
-                    obj.pos[0] += fobj.pos[0] + rel_pos[0] * math.cos(-fobj.ang) - rel_pos[1] * math.sin(-fobj.ang)
-                    obj.pos[1] += fobj.pos[1] + rel_pos[1] * math.cos(-fobj.ang) + rel_pos[0] * math.sin(-fobj.ang)
+        # só as raízes com filhos são visitadas, e cada pai é resolvido antes
+        # dos seus filhos. antes desta etapa o pos de um filho é o deslocamento
+        # da animação; depois é a posição no mundo, usada pelo render e colisão
+        roots = []
+        for handle in self.hierarchy:
+            root = self.entities.get(handle)
+            if root and root.parent is None and root.children:
+                roots.append(handle)
+                if not root.waiting:
+                    self.update_children(root)
+        self.hierarchy = roots
+
+    def update_children(self, root):
+        stack = [root]
+        while stack:
+            fobj = stack.pop()
+            c = math.cos(-fobj.ang)
+            s = math.sin(-fobj.ang)
+            # o estado anterior segue o do pai, para a interpolação
+            p = fobj.lerp(0)
+            pc = math.cos(-p[2])
+            ps = math.sin(-p[2])
+            children = []
+            for handle in fobj.children:
+                obj = self.entities.get(handle)
+                if not obj:
+                    continue
+                children.append(handle)
+                if obj.waiting:
+                    continue
+                rel_pos = obj.offset
+                x = obj.pos[0]
+                y = obj.pos[1]
+                obj.pos = [x + fobj.pos[0] + rel_pos[0] * c - rel_pos[1] * s,
+                           y + fobj.pos[1] + rel_pos[1] * c + rel_pos[0] * s]
+                obj.prev = [x + p[0] + rel_pos[0] * pc - rel_pos[1] * ps,
+                            y + p[1] + rel_pos[1] * pc + rel_pos[0] * ps, obj.ang]
+                if obj.children:
+                    stack.append(obj)
+            fobj.children = children
 
     def update_camera(self):
         margin = self.screen_w * 0.35
+        cx = self.camera.pos[0]
+        x = self.player.pos[0] - cx
 
-        level_limits = self.p0[0] <= 0 and self.player.vel[0] < 0 or self.p0[0] + 8000 >= self.screen_w and self.player.vel[0] > 0
-        screen_limits = self.player.pos[0] < margin and self.player.vel[0] < 0 or self.player.pos[0] > self.screen_w - margin and self.player.vel[0] > 0
+        level_limits = cx >= 0 and self.player.vel[0] < 0 or 8000 - cx >= self.screen_w and self.player.vel[0] > 0
+        screen_limits = x < margin and self.player.vel[0] < 0 or x > self.screen_w - margin and self.player.vel[0] > 0
 
         if level_limits and screen_limits:
-            self.camera = True
-            for obj in self.obj_list + self.wobj_list:
-                obj.pos[0] -= self.player.vel[0] * self.dt
-            self.p0[0] -= self.player.vel[0] * self.dt
-        else:
-            self.camera = False
+            self.camera.pos[0] += self.player.vel[0] * self.dt
 
     def update_keys(self):
 
@@ -2881,7 +3414,7 @@ class Simulation():
             if axis[2] < -0.5:
                 if 'g' not in self.keys:
                     self.keys.append('g')
-                    if self.player.using_weapon == False:
+                    if self.player.weapon.using_weapon == False:
                         self.player.punching = True
                         if self.soundeffects_setting:
                             r = random.randrange(0, 2)
@@ -2933,8 +3466,8 @@ class Simulation():
                             self.GameWin = True
 
                     if button[4] == 1:
-                        if self.player.has_weapon:
-                            self.player.using_weapon = not self.player.using_weapon
+                        if self.player.weapon.has_weapon:
+                            self.player.weapon.using_weapon = not self.player.weapon.using_weapon
                             if self.soundeffects_setting:
                                 self.switch_weapon_sound.play()
 
@@ -2947,11 +3480,13 @@ class Simulation():
 
                     if button[8] == 1:
                         if self.godmode_setting:
-                            self.add_guy(self.mouse_pos[0], self.mouse_pos[1])
+                            mouse = self.camera.to_world(self.mouse_pos)
+                            self.add_guy(mouse[0], mouse[1])
 
                     if button[9] == 1:
                         if self.godmode_setting:
-                            self.add_rect(self.mouse_pos[0], self.mouse_pos[1], 50, 50, 30)
+                            mouse = self.camera.to_world(self.mouse_pos)
+                            self.add_rect(mouse[0], mouse[1], 50, 50, 30)
                             self.obj_list[-1].image = [self.graphics.load_img('game_files/images/comum/box.png'), 1]
                             self.obj_list[-1].deletable = True
 
@@ -2979,7 +3514,7 @@ class Simulation():
 
                         if not removed:
                             self.keys.append('g')
-                            if self.player.using_weapon == False:
+                            if self.player.weapon.using_weapon == False:
                                 self.player.punching = True
                                 if self.soundeffects_setting:
                                     r = random.randrange(0, 2)
@@ -2987,11 +3522,13 @@ class Simulation():
 
                     elif pygame.mouse.get_pressed()[1]:
                         if self.godmode_setting:
-                            self.add_guy(self.mouse_pos[0], self.mouse_pos[1])
+                            mouse = self.camera.to_world(self.mouse_pos)
+                            self.add_guy(mouse[0], mouse[1])
 
                     elif pygame.mouse.get_pressed()[2]:
                         if self.godmode_setting:
-                            self.add_rect(self.mouse_pos[0], self.mouse_pos[1], 50, 50, 30)
+                            mouse = self.camera.to_world(self.mouse_pos)
+                            self.add_rect(mouse[0], mouse[1], 50, 50, 30)
                             self.obj_list[-1].image = [self.graphics.load_img('game_files/images/comum/box.png'), 1]
                             self.obj_list[-1].deletable = True
 
@@ -3038,9 +3575,16 @@ class Simulation():
                         if event.key == pygame.K_c:
                             self.player.life += 0.1
 
+                        if event.key == pygame.K_b and self.godmode_setting:
+                            names = list(broadphase.broadphase_dict)
+                            i = names.index(self.broadphase_setting)
+                            self.broadphase_setting = names[(i + 1) % len(names)]
+                            self.broadphase = broadphase.create(self.broadphase_setting)
+                            self.broadphase.bake(self.obj_list + self.wobj_list)
+
                         if event.key == pygame.K_f:
-                            if self.player.has_weapon:
-                                self.player.using_weapon = not self.player.using_weapon
+                            if self.player.weapon.has_weapon:
+                                self.player.weapon.using_weapon = not self.player.weapon.using_weapon
                                 if self.soundeffects_setting:
                                     self.switch_weapon_sound.play()
 
@@ -3089,7 +3633,7 @@ class Simulation():
             if key == 'shift':
                 self.player.running = True
             if key == 'g':
-                if self.player.using_weapon:
+                if self.player.weapon.using_weapon:
                     self.player.shooting = True
                     self.player.punching = False
         if not self.xbox:
@@ -3098,7 +3642,7 @@ class Simulation():
             self.player.walking = v
 
     def update_deaths(self):
-        for obj in self.obj_list + self.wobj_list:
+        for obj in list(self.obj_list):
 
             time_death = obj.life_time > obj.max_life_time
             fall_death = obj.pos[1] > self.screen_h * 1.5 and not obj.figure and not obj.static
@@ -3124,7 +3668,7 @@ class Simulation():
 
                 points.append(point)
 
-                self.hits.append([a.ID, b.ID, normal, abs(pd), points])
+                self.hits.append([a.ID, b.ID, normal, abs(pd), points, [0]])
                 return True
 
         def collision_Poly_Circle(a, b):
@@ -3151,6 +3695,7 @@ class Simulation():
                         pd = m - b.radius
                         normal = an[i]
                         point = [b.pos[0] - normal[0] * m, b.pos[1] - normal[1] * m]
+                        feature = i
                         is_inside = True
                     else:
                         return False
@@ -3166,14 +3711,16 @@ class Simulation():
                     pd = - (m + b.radius)
                     normal = an[best_i]
                     point = [b.pos[0] + normal[0] * m, b.pos[1] + normal[1] * m]
+                    feature = best_i
 
                 else:
                     m = math.inf
-                    for v in av:
-
+                    for k in range(a.vertex_count):
+                        v = av[k]
                         if funcs.dpp(b.pos, v) < m:
                             m = funcs.dpp(b.pos, v)
                             ext_p = v
+                            feature = a.vertex_count + k
                     if m < b.radius:
                         normal = funcs.norm([b.pos[0] - ext_p[0], b.pos[1] - ext_p[1]])
                         pd = m - b.radius
@@ -3188,7 +3735,7 @@ class Simulation():
 
             points.append(point)
 
-            self.hits.append([a.ID, b.ID, normal, abs(pd), points])
+            self.hits.append([a.ID, b.ID, normal, abs(pd), points, [feature]])
             return True
 
         def collision_Poly_Poly(a, b):
@@ -3208,6 +3755,7 @@ class Simulation():
             point = [0, 0]
             m = math.inf
             points = []
+            features = []
             av = a.vertex
             bv = b.vertex
             for nv in a.normals + b.normals:
@@ -3221,21 +3769,25 @@ class Simulation():
                     m = min(abs(maxA - minB), abs(maxB - minA))
                     normal = nv
 
-            for p in av:
+            for k in range(a.vertex_count):
+                p = av[k]
                 d = math.inf
                 if b.inside(p):
                     dm = min_distance(p, b)
                     if dm < d:
                         d = dm
                         points.append(p)
+                        features.append((a.ID, k))
 
-            for p in bv:
+            for k in range(b.vertex_count):
+                p = bv[k]
                 d = math.inf
                 if a.inside(p):
                     dm = min_distance(p, a)
                     if dm < d:
                         d = dm
                         points.append(p)
+                        features.append((b.ID, k))
 
             rp = [b.pos[0] - a.pos[0], b.pos[1] - a.pos[1]]
 
@@ -3262,7 +3814,7 @@ class Simulation():
                         b.in_ground = True
                         b.ground = a
 
-            self.hits.append([a.ID, b.ID, normal, abs(pd), points])
+            self.hits.append([a.ID, b.ID, normal, abs(pd), points, features])
             return True
 
         def detection(A, B):
@@ -3280,101 +3832,73 @@ class Simulation():
 
         def collision_response():
 
+            contacts = {}
+
             for hit in self.hits:
 
-                [IDA, IDB, n, pd, points] = hit
+                [IDA, IDB, n, pd, points, features] = hit
 
                 A = self.find_obj(IDA)
                 B = self.find_obj(IDB)
 
-                if not (A.name == 'bullet' and B.name == 'bullet'):
-                    A.hits.append(B)
-                    B.hits.append(A)
-
-                if A.collider and B.collider and A.exclude(B) and B.exclude(A):
-
-                    for p in points:
-
-                        rA = [p[0] - A.pos[0], p[1] - A.pos[1]]
-                        rB = [p[0] - B.pos[0], p[1] - B.pos[1]]
-                        rv = [B.vel[0] + funcs.cross(B.ang_vel, rB)[0] - A.vel[0] - funcs.cross(A.ang_vel, rA)[0],
-                              B.vel[1] + funcs.cross(B.ang_vel, rB)[1] - A.vel[1] - funcs.cross(A.ang_vel, rA)[1]]
-
-                        vn = funcs.dot(rv, n)
-
-                        if A.is_player or B.is_player:
-                            e = eu = du = 0
-                        else:
-                            e = min(A.e, B.e)
-                            eu = (A.eu + B.eu) / 2
-                            du = (A.du + B.du) / 2
-
-                        total_sum = A.inv_mass + B.inv_mass + A.inv_inertia * funcs.cross(rA, n) ** 2 + B.inv_inertia * funcs.cross(rB, n) ** 2
-                        total_mass = A.inv_mass + B.inv_mass
-
-                        if total_sum == 0:
-                            total_sum = math.inf
-                        if total_mass == 0:
-                            total_mass = math.inf
-
-                        # impulse
-
-                        j = -(e + 1) * vn / (total_sum * len(points))
-                        impulse = [j * n[0], j * n[1]]
-                        neg_impulse = [-impulse[0], -impulse[1]]
-
-                        if vn < 0:
-                            A.apply_impulse(neg_impulse, rA)
-                            B.apply_impulse(impulse, rB)
-
-                        # friction
-
-                        t = funcs.norm([rv[0] - funcs.dot(rv, n) * n[0], rv[1] - funcs.dot(rv, n) * n[1]])
-
-                        jt = -funcs.dot(rv, t) / total_sum / len(points)
-
-                        if abs(jt) < j * eu:
-                            friction = [jt * t[0], jt * t[1]]
-                        else:
-                            friction = [-j * du * t[0], -j * du * t[1]]
-
-                        neg_friction = [-friction[0], -friction[1]]
-
-                        if vn < 0:
-                            A.apply_impulse(neg_friction, rA)
-                            B.apply_impulse(friction, rB)
-
-                        # position correction
-
-                        percent = 0.4
-                        slop = 0.1
-                        cr = percent * max(pd - slop, 0) / total_mass
-                        correction = [cr * n[0], cr * n[1]]
-
-                        A.pos[0] -= correction[0] * A.inv_mass
-                        A.pos[1] -= correction[1] * A.inv_mass
-                        B.pos[0] += correction[0] * B.inv_mass
-                        B.pos[1] += correction[1] * B.inv_mass
+                A.hits.append(B)
+                B.hits.append(A)
+
+                if A.collider and B.collider:
+
+                    # a chave não depende da ordem do par, que muda quando a
+                    # obj_list é reordenada; a normal guardada pode estar invertida
+                    for k in range(len(points)):
+                        key = (IDA, IDB, features[k]) if IDA < IDB else (IDB, IDA, features[k])
+                        contact = Contact(A, B, points[k], n, pd, len(points))
+                        cached = self.contacts.get(key)
+                        if cached and funcs.dot(cached.normal, n) * (1 if cached.A is A else -1) > 0.9:
+                            contact.jn = cached.jn
+                            contact.jt = cached.jt
+                        contacts[key] = contact
+                        A.contact_keys.add(key)
+                        B.contact_keys.add(key)
+
+            # contatos que não se repetiram neste frame são descartados,
+            # e um corpo dormindo que perdeu um contato acorda
+            for key, contact in self.contacts.items():
+                if key not in contacts and (contact.A.sleeping or contact.B.sleeping):
+                    contact.A.wake()
+                    contact.B.wake()
+            self.contacts = contacts
+
+        def resting(obj):
+            return obj.sleeping or (obj.static and not (obj.vel[0] or obj.vel[1] or obj.ang_vel))
 
         def verify():
 
             self.hits = []
-            i = 0
             for obj in self.obj_list:
-                obj.set_box()
+                # as chaves de cada corpo são refeitas junto com os caches
+                obj.contact_keys.clear()
+                obj.hit_keys.clear()
+                if not obj.sleeping:
+                    obj.set_box()
                 if obj.is_player:
                     obj.in_ground = False
 
-            while i < len(self.obj_list):
-                j = i + 1
-                while j < len(self.obj_list):
-                    A = self.obj_list[i]
-                    B = self.obj_list[j]
-
-                    if self.inside_box(A, B.box) and (not A.static or not B.static) and (not A.figure and not B.figure):
+            # pares em repouso reaproveitam os hits do frame anterior
+            hit_cache = {}
+            for A, B in self.broadphase.pairs(self.obj_list):
+                if self.inside_box(A, B.box):
+                    [P, Q] = [A, B] if A.ID < B.ID else [B, A]
+                    key = (P.ID, Q.ID)
+                    n = len(self.hits)
+                    pose = [P.pos[0] - Q.pos[0], P.pos[1] - Q.pos[1], P.ang, Q.ang]
+                    cached = self.hit_cache.get(key)
+                    if cached and resting(A) and resting(B) and max(abs(cached[0][k] - pose[k]) for k in range(4)) < 1e-6:
+                        self.hits.extend(cached[1])
+                    else:
                         detection(A, B)
-                    j += 1
-                i += 1
+                    hit_cache[key] = [pose, self.hits[n:]]
+                    P.hit_keys.add(key)
+                    Q.hit_keys.add(key)
+            self.hit_cache = hit_cache
 
             collision_response()
 
@@ -3387,7 +3911,7 @@ class Simulation():
                     p = False
                     if h[0] == self.player.ID and h[1] == obj.ID:
                         p = True
-                    if funcs.delay(p, 1, self.t, 'col time'):
+                    if self.timers.delay(p, 1, self.t, None, 'col time'):
                         self.player.vel[0] -= h[2][0] * obj.deadly
                         self.player.vel[1] -= h[2][1] * obj.deadly
                         self.player.life -= obj.deadly / 10
@@ -3403,13 +3927,13 @@ class Simulation():
 
     def del_dist_joint(self, params):
         for i in range(len(self.dist_joint_list)):
-            if self.dist_joint_list[i] == params:
+            if self.dist_joint_list[i][:6] == params:
                 del self.dist_joint_list[i]
                 break
 
     def del_rev_joint(self, params):
         for i in range(len(self.rev_joint_list)):
-            if self.rev_joint_list[i] == params:
+            if self.rev_joint_list[i][:5] == params:
                 del self.rev_joint_list[i]
 
     def destroy_enemy(self, player):
@@ -3420,36 +3944,86 @@ class Simulation():
             player.vel[1] += j[1]
             player.ang_vel -= 200 * math.pi / 180 * d
             player.stop = True
-            if player.has_weapon:
-                player.has_weapon = False
-                player.using_weapon = False
-                self.add_gun(player.pos, player.ammo)
+            if player.weapon.has_weapon:
+                player.weapon.has_weapon = False
+                player.weapon.using_weapon = False
+                self.add_gun(player.pos, player.weapon.ammo)
             player.max_life_time = player.life_time + 1
 
-    def destroy_obj(self, ID, wait=False):
-        if wait:
-            list = self.wobj_list
+    def add_obj(self, obj):
+        self.insert_obj(obj, False)
+        obj.handle = self.entities.add(obj)
+        self.obj_dict[obj.ID] = obj
+        if obj.name in self.name_dict:
+            self.name_dict[obj.name].append(obj)
         else:
-            list = self.obj_list
-        i = 0
-        while i < len(list):
-            if list[i].ID == ID:
-                if list[i].is_player:
-                    del list[i]
-                    del list[i]
-                    del list[i]
-                    del list[i]
-                    del list[i]
-                    del list[i]
-                else:
-                    del list[i]
-                return
-            i += 1
-
-    def get_lever(self, name):
-        lever = self.find_obj(name)
+            self.name_dict[obj.name] = [obj]
+
+    def remove_obj(self, obj):
+        self.pull_obj(obj)
+        # a linha no store é liberada aqui, não quando o python coletar o
+        # objeto; os do pool ficam com a linha para a próxima vida
+        if obj.pool:
+            obj.pool.release(obj)
+        else:
+            self.store.remove(obj.row)
+        self.entities.remove(obj.handle)
+        self.timers.release(obj.ID)
+        self.tweens.release(obj.ID)
+        self.blackboard.clear(obj.ID)
+        self.forget_contacts(obj)
+        self.broadphase.remove(obj)
+        self.chunks.remove(obj)
+        del self.obj_dict[obj.ID]
+        same_name = self.name_dict[obj.name]
+        same_name.remove(obj)
+        if not same_name:
+            del self.name_dict[obj.name]
+
+    def forget_contacts(self, obj):
+        # contatos e hits guardados do corpo não passam para quem reusar o ID
+        # ou o corpo; só as chaves do próprio corpo são visitadas
+        for key in obj.contact_keys:
+            self.contacts.pop(key, None)
+        for key in obj.hit_keys:
+            self.hit_cache.pop(key, None)
+        obj.contact_keys.clear()
+        obj.hit_keys.clear()
+
+    def insert_obj(self, obj, wait):
+        list = self.wobj_list if wait else self.obj_list
+        obj.waiting = wait
+        obj.index = len(list)
+        list.append(obj)
+        if not wait:
+            self.broadphase.insert(obj)
+
+    def pull_obj(self, obj):
+        # o último da lista ocupa o lugar do removido
+        list = self.wobj_list if obj.waiting else self.obj_list
+        last = list.pop()
+        if last is not obj:
+            list[obj.index] = last
+            last.index = obj.index
+
+    def move_obj(self, obj, wait):
+        self.pull_obj(obj)
+        self.insert_obj(obj, wait)
 
-        pos = self.find_obj(lever.ID - 1).pos
+    def destroy_obj(self, ID, wait=False):
+        obj = self.obj_dict.get(ID)
+        if not obj or obj.waiting != wait:
+            return
+        if obj.is_player:
+            for part in obj.parts():
+                if part and self.obj_dict.get(part.ID) is part:
+                    self.remove_obj(part)
+        self.remove_obj(obj)
+
+    def get_lever(self, record):
+        lever = self.resolve(record[1])
+
+        pos = self.resolve(record[2]).pos
         x = lever.pos[0] - pos[0]
 
         lever.vel[1] = 0
@@ -3463,14 +4037,14 @@ class Simulation():
             lever.pos[1] = pos[1] - 50 - 5.9 * math.cos(x * math.pi / 50)
             lever.vel[0] += funcs.signal(x) * 18
 
-        self.draw_line.append([funcs.colors('white'), lever.pos, pos, 5])
+        self.draw_line.append([funcs.colors('white'), lever.pos.tolist(), pos.tolist(), 5])
 
         return x > 0
 
-    def get_button(self, name, wait_time=0, time_to_wait=0.1):
-        button = self.find_obj(name)
-        pos = self.find_obj(button.ID - 1).pos
-        v = 1 / self.dt
+    def get_button(self, record, wait_time=0, time_to_wait=0.1):
+        button = self.resolve_moving(record[1])
+        pos = self.resolve(record[2]).pos
+        v = self.fps
         pressing = False
         for h in self.hits:
             if h[0] == button.ID:
@@ -3478,29 +4052,29 @@ class Simulation():
                 if obj:
                     if obj.box[3] < button.pos[1]:
                         pressing = True
-                        v = 1 / self.dt
+                        v = self.fps
                         break
             elif h[1] == button.ID:
                 obj = self.find_obj(h[0])
                 if obj:
                     if obj.box[3] < button.pos[1]:
                         pressing = True
-                        v = 3 / self.dt if obj.is_player else 2 / self.dt
+                        v = 3 * self.fps if obj.is_player else 2 * self.fps
                         break
         if not pressing:
-            pressing = not funcs.wait(0.1, self.t, 'button delay' + name)
+            pressing = not self.timers.wait(0.1, self.t, button.ID, 'button delay')
         button.vel[1] = 0
 
-        go = funcs.register('pressing delay' + name, 0, True)[0]
+        go = record[3]
 
         if pressing and button.pos[1] < pos[1]-5:
             button.vel[1] += v
 
-        if pressing and funcs.wait(time_to_wait, self.t, 'pressing delay2' + name):
-            funcs.register('pressing delay' + name, 1, False)
+        if pressing and self.timers.wait(time_to_wait, self.t, button.ID, 'pressing delay2'):
+            record[3] = False
 
         if not pressing and button.pos[1] >= pos[1] - 20:
-            if funcs.wait(wait_time, self.t, 'pressing delay' + name) or go:
+            if self.timers.wait(wait_time, self.t, button.ID, 'pressing delay') or go:
                 button.vel[1] -= v
 
         return button.pos[1] > pos[1] - 10
@@ -3508,44 +4082,32 @@ class Simulation():
     # funções úteis
 
     def find_obj(self, key, w=False):
-
-        if w:
-            list = self.obj_list + self.wobj_list
-        else:
-            list = self.obj_list
-
+        # busca em obj_list e wobj_list pelos índices do registro
         if type(key) is int:
-            for obj in self.obj_list + self.wobj_list:
-                if obj.ID == key:
-                    return obj
+            return self.obj_dict.get(key, False)
         if type(key) is str:
-            for obj in self.obj_list + self.wobj_list:
-                if obj.name == key:
-                    return obj
+            same_name = self.name_dict.get(key)
+            if same_name:
+                return same_name[0]
         return False
 
-    def translade(self, ID, bool, vel, posA, posB, d):
-        # bool: variavel que controla a direçao
-        # vel: vel do movimento
-        # posA e pos B: pos max e min do movimento
-        # d: 0 para movimento horizontal e 1 para movimento vertical
-
-        obj = self.find_obj(ID)
-        posA += self.p0[d]
-        posB += self.p0[d]
+    def get_handle(self, name):
+        # scripts de nível guardam handles, resolvidos uma vez no generate_scene
+        obj = self.find_obj(name)
+        return obj.handle if obj else None
 
-        maxd = max(posA, posB)
-        mind = min(posA, posB)
-
-        if obj.pos[d] > maxd:
-            obj.pos[d] = maxd
-        elif obj.pos[d] < mind:
-            obj.pos[d] = mind
-
-        obj.vel[d] = vel if bool else -vel
+    def resolve(self, handle):
+        if handle is None:
+            return False
+        return self.entities.get(handle)
 
-        if (obj.pos[d] <= mind and obj.vel[d] < 0) or (obj.pos[d] >= maxd and obj.vel[d] > 0):
-            obj.vel[d] = 0
+    def resolve_moving(self, handle):
+        # como resolve, para corpos que o roteiro do nível vai mexer: a
+        # broadphase passa a conferir a caixa deles
+        obj = self.resolve(handle)
+        if obj:
+            self.broadphase.touch(obj)
+        return obj
 
     # Funções que retornam True ou False
 
@@ -3556,42 +4118,44 @@ class Simulation():
             return False
         return True
 
+    def ray_cast(self, p1, p2, body=None):
+        # primeiro objeto cortado pelo segmento p1-p2: [t, obj, ponto, normal]
+        box = [min(p1[0], p2[0]), max(p1[0], p2[0]), min(p1[1], p2[1]), max(p1[1], p2[1])]
+        best = False
+        for obj in self.broadphase.query(box, self.obj_list):
+            if obj.figure or (body and not broadphase.collides(body, obj)):
+                continue
+            if obj.type == 'circle':
+                hit = funcs.segment_circle(p1, p2, obj.pos, obj.radius)
+            else:
+                hit = funcs.segment_poly(p1, p2, obj.vertex, obj.normals)
+            if hit and (not best or hit[0] < best[0]):
+                best = [hit[0], obj, hit[1]]
+        if not best:
+            return False
+        [t, obj, normal] = best
+        return [t, obj, [p1[0] + (p2[0] - p1[0]) * t, p1[1] + (p2[1] - p1[1]) * t], normal]
+
     def in_scene(self, obj, w_margin=0, h_margin=0):
         if obj:
-            if obj.box[1] < - w_margin or obj.box[0] > self.screen_w + w_margin:
-                return False
-
-            if obj.box[3] < - h_margin or obj.box[2] > self.screen_h + h_margin:
-                return False
-            return True
-
-    def got_hit(self, name0, name1):
-
-        obj0 = self.find_obj(name0)
-        obj1 = self.find_obj(name1)
-        if obj1:
-            if funcs.register('hit' + str(obj1.ID), 0)[0]:
-                return True
-            else:
-                for h in self.hits:
-                    if h[0] == obj0.ID and h[1] == obj1.ID or h[1] == obj0.ID and h[0] == obj1.ID:
-                        funcs.register('hit' + str(obj1.ID), 1, True)
-                        return True
-                return False
+            return self.camera.sees(obj.box, w_margin, h_margin)
 
     # renderizar items
 
     def render(self):
 
+        camera = self.camera
+        screen = camera.to_screen
+
         def draw_surfaces():
             for f in self.draw_line:
-                self.graphics.draw_line(f[0], f[1], f[2], f[3])
+                self.graphics.draw_line(f[0], screen(f[1]), screen(f[2]), f[3])
 
             for f in self.draw_circle:
-                self.graphics.draw_circle(f[0], f[1], f[2], f[3])
+                self.graphics.draw_circle(f[0], screen(f[1]), f[2], f[3])
 
             for f in self.draw_polygon:
-                self.graphics.draw_polygon(f[0], f[1], f[2])
+                self.graphics.draw_polygon(f[0], [screen(p) for p in f[1]], f[2])
 
         def draw_back_sprites():
             add = []
@@ -3600,20 +4164,23 @@ class Simulation():
                     add.append(spt)
             add = sorted(add, key=itemgetter(1))
             for a in add[::-1]:
-                p0 = [self.p0[0]/a[1], self.p0[1]/a[1]]
-                self.graphics.show(a[0], p0)
+                # parallax: o fundo anda 1/z do que a câmera anda
+                self.graphics.show(a[0], [-camera.pos[0]/a[1], -camera.pos[1]/a[1]])
 
         def draw_objects():
             for obj in self.obj_list:
                 if obj.type == 'poly' and obj.visible:
-                    self.graphics.draw_polygon(obj.color, obj.vertex, obj.thickness)
+                    self.graphics.draw_polygon(obj.color, [screen(v) for v in obj.draw_vertex(self.alpha)], obj.thickness)
                 if obj.type == 'circle' and obj.visible:
-                    cos = math.cos(-obj.ang - math.pi / 2)
-                    sin = math.sin(-obj.ang - math.pi / 2)
+                    p = obj.lerp(self.alpha)
+                    p = [p[0] - camera.pos[0], p[1] - camera.pos[1], p[2]]
+                    cos = math.cos(-p[2] - math.pi / 2)
+                    sin = math.sin(-p[2] - math.pi / 2)
                     r = obj.radius
-                    p = obj.pos
                     self.graphics.draw_circle(obj.color, [int(p[0]), int(p[1])], r, obj.thickness)
                     self.graphics.draw_line(obj.color, [int(p[0]), int(p[1])], [int(p[0]) + r * cos, int(p[1] + r * sin)], obj.thickness)
+            for bullet in self.bullet_list:
+                self.graphics.draw_circle(bullet.color, screen(bullet.pos), bullet.radius, 0)
 
         def draw_special_sprites():
             for s in self.special_sprites:
@@ -3622,7 +4189,7 @@ class Simulation():
                 ang = s[2]
                 max_dist = s[3]
 
-                pos = (pos[0] + max_dist*math.sin(ang), pos[1])
+                pos = screen([pos[0] + max_dist*math.sin(ang), pos[1]])
 
                 self.graphics.draw_special_image(img, pos, ang, max_dist)
 
@@ -3631,32 +4198,34 @@ class Simulation():
             for obj in self.obj_list:
                 if obj.image:
                     limit = 1
-                    if obj.box[0] < self.screen_w * limit and obj.box[1] > self.screen_w * (1 - limit):
+                    x = camera.pos[0]
+                    if obj.box[0] < x + self.screen_w * limit and obj.box[1] > x + self.screen_w * (1 - limit):
                         add.append([obj, obj.image[1]])
-            add = sorted(add, key=itemgetter(1))
+            # desempate pelo ID: a ordem da obj_list muda com as remoções
+            add = sorted(add, key=lambda a: (a[1], a[0].ID))
             front = []
             for a in add:
                 if a[1] < 0:
-                    self.graphics.draw_image(a[0])
+                    self.graphics.draw_image(a[0], self.alpha, camera.pos)
                 else:
                     front.append(a)
             return front
 
         def draw_objects_images_front(f):
             for a in f:
-                self.graphics.draw_image(a[0])
+                self.graphics.draw_image(a[0], self.alpha, camera.pos)
 
         def draw_front_sprites():
             for spt in self.sprites:
                 sprite = spt[0]
                 z = spt[1]
                 if z < 0:
-                    self.graphics.show(sprite, self.p0)
+                    self.graphics.show(sprite, screen([0, 0]))
 
         def draw_hits_sprites():
             for sprite in self.hits_sprites:
                 img = sprite[0]
-                pos = sprite[1]
+                pos = screen(sprite[1])
                 re = img.get_rect()
                 pos = [pos[0] - re[2] / 2, pos[1] - re[3] / 2]
                 self.graphics.show(img, pos)
@@ -3667,13 +4236,13 @@ class Simulation():
                     is_main = obj.name == 'main'
                     h = 20 if is_main else 1
                     w = 200  if is_main else 80
-                    x = 20 if is_main else obj.pos[0]
-                    y = 20 if is_main else obj.pos[1] - 100
+                    x = 20 if is_main else obj.pos[0] - camera.pos[0]
+                    y = 20 if is_main else obj.pos[1] - camera.pos[1] - 100
                     if obj.life > 1:
                         obj.life = 1
                     elif obj.life < 0:
                         obj.life = 0
-                    life = funcs.step_response(w * obj.life, 0.5, self.t, 'life' + str(obj.ID))
+                    life = self.tweens.response(w * obj.life, 0.5, self.t, obj.ID, 'life')
 
                     if obj.life >= 0.41:
                         color = funcs.colors('green')
@@ -3689,7 +4258,7 @@ class Simulation():
                         self.graphics.draw_polygon(color, [[x - life/2, y + h], [x - life/2, y], [x + life/2, y], [x + life/2, y + h]], 0)
 
             color = funcs.colors('light red') if self.player.shooting or self.player.punching else funcs.colors('white')
-            positions = funcs.history(self.mouse_pos, 5, 'mouse pos')
+            positions = self.blackboard.history(self.mouse_pos, 5, 'level', 'mouse pos')
             a = 5
             for p in positions:
 
@@ -3705,22 +4274,23 @@ class Simulation():
                 self.graphics.write('Ammo: infinite', (xi, yi + hi + 30))
                 self.graphics.write('itens: ' + str(len(self.obj_list)), (xi, yi + hi + 50))
                 self.graphics.write('FPS: ' + str(int(self.fps_now)), (xi, yi + hi + 70))
-                self.graphics.draw_line(funcs.colors('white'), (xi, yi + hi + 100), (xi + funcs.meter, yi + hi + 100), 1)
-                self.graphics.draw_line(funcs.colors('white'), (xi + self.t * funcs.meter % funcs.meter, yi + hi + 110), (xi + self.t * funcs.meter % funcs.meter, yi + hi + 90), 1)
+                self.graphics.write('Broadphase: ' + self.broadphase_setting + ' (B)', (xi, yi + hi + 90))
+                self.graphics.draw_line(funcs.colors('white'), (xi, yi + hi + 120), (xi + funcs.meter, yi + hi + 120), 1)
+                self.graphics.draw_line(funcs.colors('white'), (xi + self.t * funcs.meter % funcs.meter, yi + hi + 130), (xi + self.t * funcs.meter % funcs.meter, yi + hi + 110), 1)
             else:
                 self.graphics.write('Lifes: ' + str(int(self.lifes_left)), (xi, yi + hi + 10))
-                self.graphics.write('Ammo: ' + str(int(self.player.ammo)), (xi, yi + hi + 30))
+                self.graphics.write('Ammo: ' + str(int(self.player.weapon.ammo)), (xi, yi + hi + 30))
 
         def draw_lights():
            for light in self.draw_lights:
                 mask = light[0]
-                draw_pos = light[1]
+                draw_pos = screen(light[1])
                 self.graphics.gameDisplay.blit(mask, draw_pos)
 
         def change(dir):
             for obj in self.obj_list:
                 if obj.is_player:
-                    obj.pos[1] -= 5 * dir
+                    obj.translate([0, -5 * dir])
                     obj.set_vertex()
 
         self.graphics.fill(funcs.colors('black'))
@@ -3743,7 +4313,7 @@ class Simulation():
         pygame.mixer.music.pause()
         self.graphics.set_mouse(True)
         pygame.image.save(self.graphics.gameDisplay, 'game_files/images/temp/screenshot.png')
-        img = self.graphics.load_img('game_files/images/temp/screenshot.png')
+        img = self.graphics.load_img('game_files/images/temp/screenshot.png', False)
         b = self.settings_menu(img)
         if b == 0:
             self.Pause = False